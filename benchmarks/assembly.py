@@ -0,0 +1,143 @@
+"""Benchmarks assembling and writing ebooks of synthetic stories, without any network.
+
+Every case runs in a fresh process, so its peak memory is its own:
+
+    $ python benchmarks/assembly.py --sizes 10,100,1000,5000
+
+"fresh" builds the ebook from scratch, "update" adds one chapter to the ebook built by
+"fresh", which reuses all the chapters already in it.
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import attr
+import click
+from bs4.element import Tag  # type: ignore
+from furl import furl  # type: ignore
+
+from pyffdl.sites.story import Story
+from pyffdl.utilities import events
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+def paragraph(number: int, words: int = 60) -> str:
+    return "<p>" + " ".join(WORDS[(number + x) % len(WORDS)] for x in range(words)) + ".</p>"
+
+
+@attr.s
+class SyntheticTransport(Transport):
+    """Serves a story's main page and chapters, generated on request."""
+
+    chapters: int = attr.ib()
+    paragraphs: int = attr.ib(default=20)
+
+    def main_page(self) -> str:
+        options = "".join(f'<option value="{x}">{x}. Chapter {x}</option>' for x in range(1, self.chapters + 1))
+        return f'<html><body><h1>Synthetic Story</h1><select id="chapters">{options}</select></body></html>'
+
+    def chapter(self, number: int) -> str:
+        return "".join(paragraph(number * self.paragraphs + x) for x in range(self.paragraphs))
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> TransportResponse:
+        chapter = furl(url).args.get("chapter")
+        text = self.chapter(int(chapter)) if chapter else self.main_page()
+        return TransportResponse(url, 200, text.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
+
+
+@attr.s(auto_attribs=True)
+class SyntheticStory(Story):
+    @staticmethod
+    def get_raw_text(response: TransportResponse) -> str:
+        return response.text
+
+    @staticmethod
+    def chapter_parser(value: Tag) -> Tuple[str, str]:
+        return value["value"], value.text.split(". ", 1)[-1]
+
+    @property
+    def select(self) -> str:
+        return "select#chapters option"
+
+    def make_title_page(self) -> None:
+        self.metadata.title = "Synthetic Story"
+        # pylint:disable=assigning-non-slot
+        self.metadata.author.name = "Benchmark"
+        self.metadata.summary = paragraph(0, 120)
+
+    def make_new_chapter_url(self, url: furl, value: str) -> Optional[furl]:
+        url.args["chapter"] = value
+        return url
+
+
+def peak_memory() -> int:
+    """Returns the peak resident memory of this process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def build(filename: str, chapters: int, paragraphs: int, force: bool, options: Dict[str, Any]) -> Dict[str, Any]:
+    events.configure(Path(filename).with_suffix(".log"))
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        story = SyntheticStory(
+            "https://synthetic.invalid/story",
+            verbose=False,
+            force=force,
+            transport=SyntheticTransport(chapters, paragraphs),
+            filename=filename,
+            **options,
+        )
+        story.run()
+    elapsed = time.perf_counter() - started
+    events.flush()
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak_memory() / 2 ** 20, 1)}
+
+
+def run_case(*args) -> Dict[str, Any]:
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(build, args)
+
+
+def benchmark(sizes: List[int], paragraphs: int, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            filename = str(Path(folder) / f"story-{size}.epub")
+            for mode, chapters, force in (("fresh", size, True), ("update", size + 1, False)):
+                result = run_case(filename, chapters, paragraphs, force, options)
+                result.update(chapters=size, mode=mode, size_mb=round(Path(filename).stat().st_size / 2 ** 20, 2))
+                results.append(result)
+                click.echo(
+                    f"{size:>6} chapters  {mode:<6}  {result['seconds']:>9.3f} s  "
+                    f"{result['peak_mb']:>8.1f} MB peak  {result['size_mb']:>8.2f} MB ebook",
+                    err=True,
+                )
+    return results
+
+
+@click.command()
+@click.option("--sizes", default="10,100,1000,5000", show_default=True, help="Chapter counts to build.")
+@click.option("--paragraphs", type=int, default=20, show_default=True, help="Paragraphs per chapter.")
+@click.option("--compression", default="default", show_default=True)
+@click.option("--fast-write", is_flag=True, default=False)
+@click.option("--minify", is_flag=True, default=False)
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the results as JSON.")
+def main(sizes: str, paragraphs: int, compression: str, fast_write: bool, minify: bool, as_json: bool) -> None:
+    options = {"compression": compression, "fast_write": fast_write, "minify": minify}
+    results = benchmark([int(x) for x in sizes.split(",")], paragraphs, options)
+    if as_json:
+        click.echo(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()  # pylint:disable=no-value-for-parameter
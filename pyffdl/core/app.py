@@ -1,24 +1,30 @@
-import shutil
+import threading
 import warnings
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce, wraps
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
 
 import attr
 import click
+import pendulum
 from furl import furl  # type: ignore
 
 from pyffdl.__version__ import __version__
-from pyffdl.sites import (AdultFanFictionStory, ArchiveOfOurOwnStory, FanFictionNetStory, HTMLStory, TGStorytimeStory,
-                          TwistingTheHellmouthStory)
-from pyffdl.utilities import get_url_from_file, list2text
-
-AVAILABLE_SITES = {
-    "fanfiction.net": FanFictionNetStory,
-    "fictionpress.com": FanFictionNetStory,
-    "adult-fanfiction.org": AdultFanFictionStory,
-    "archiveofourown.org": ArchiveOfOurOwnStory,
-    "tthfanfic.org": TwistingTheHellmouthStory,
-    "tgstorytime.com": TGStorytimeStory,
-}
+from pyffdl.core.author import AuthorError, author_works
+from pyffdl.core.check import check, read_book, write_report
+from pyffdl.core.export import export_metadata
+from pyffdl.core.intake import read_urls, unique_urls
+from pyffdl.core.jobqueue import DEFAULT_LEASE, JobQueue, work
+from pyffdl.core.schedule import POLICIES, Estimate, Planned
+from pyffdl.core.server import JobManager, make_server
+from pyffdl.core.watch import Watchlist, default_watchlist, watch
+from pyffdl.sites import SITES, HTMLStory, get_site
+from pyffdl.sites.story import Story, last_volume
+from pyffdl.utilities import events, files, get_url_from_file, list2text
+from pyffdl.utilities.images import MEGABYTE, ImageOptions
+from pyffdl.utilities.writer import Compression
 
 
 @attr.s()
@@ -27,32 +33,271 @@ class URL:
     file: Optional[str] = attr.ib(default=None)
 
 
-def download(urls: list[URL], verbose: bool = False, force: bool = False) -> None:
-    for url in urls:
-        if not url.url:
-            continue
-        try:
-            host = ".".join(url.url.host.split(".")[-2:])
-            site = AVAILABLE_SITES.get(host)
-            if not site:
-                click.echo(
-                    f"{__file__} is currently only able to download from {list2text(list(AVAILABLE_SITES.keys()))}."
-                )
+def open_story(
+        url: URL, verbose: bool = False, force: bool = False, prepare: bool = False, **options
+) -> Optional[Story]:
+    """Fetches the story's main page and, with ``prepare``, gets it ready to be downloaded."""
+    site = get_site(url.url)
+    if not site:
+        click.echo(
+            f"{__file__} is currently only able to download from {list2text(SITES.hosts())}."
+        )
+        return None
+    story = site.parse(url.url, verbose, force, **options)
+    if url.file:
+        story.filename = url.file
+    if prepare:
+        story.prepare()
+    return story
+
+
+def run_story(story: Story) -> Story:
+    story.run()
+    return story
+
+
+def download_story(url: URL, verbose: bool = False, force: bool = False, **options) -> Optional[Story]:
+    story = open_story(url, verbose, force, **options)
+    return run_story(story) if story else None
+
+
+def download_pipelined(urls: Iterable[URL], verbose: bool = False, force: bool = False, **options) -> None:
+    """Downloads the stories one by one, preparing the next story while the current one downloads."""
+    urls = iter(urls)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        upcoming = [pool.submit(open_story, x, verbose, force, True, **options) for x in islice(urls, 1)]
+        while upcoming:
+            story = upcoming.pop().result()
+            if not story:
                 return
-            story = site.parse(url.url, verbose, force)
-            if url.file:
-                story.filename = url.file
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                story.run()
-        except AttributeError as e:
-            raise e
+            upcoming += [pool.submit(open_story, x, verbose, force, True, **options) for x in islice(urls, 1)]
+            run_story(story)
+
+
+def plan_story(url: URL, force: bool = False, **options) -> Optional[Planned]:
+    """Reads the story's main page and works out how much of it there is to download."""
+    try:
+        story = open_story(url, False, force, **options)
+        if not story:
+            return None
+        story.make_title_page()
+        story.get_chapters()
+        stored = read_book(last_volume(url.file) or Path(url.file))[1] if url.file and not force else 0
+        return Planned.from_story(url, story, stored)
+    except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+        click.echo(f"Preparing {url.url} failed: {e!r}", err=True)
+        return None
+
+
+def download_scheduled(
+        urls: Iterable[URL],
+        verbose: bool = False,
+        force: bool = False,
+        jobs: int = 1,
+        policy: str = "shortest",
+        **options,
+) -> None:
+    """Plans all the stories, then downloads them in the order the policy says.
+
+    Only the main pages are fetched while planning, ``jobs`` at a time, and only the
+    estimates and the pages' content are kept; each story is parsed again from its page
+    just before it's downloaded. The time left is estimated as every story finishes.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        plans = POLICIES[policy]([x for x in pool.map(lambda x: plan_story(x, force, **options), urls) if x])
+    estimate = Estimate(sum(x.words for x in plans), len(plans))
+    click.echo(f"Downloading {estimate.total:,} words of {len(plans)} stories, {policy} first.", err=True)
+
+    def download_one(plan: Planned) -> None:
+        try:
+            download_story(plan.url, verbose and jobs == 1, force, main_page=plan.page, **options)
+        except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+            click.echo(f"Downloading {plan.url.url} failed: {e!r}", err=True)
+        plan.page = None
+        estimate.finish(plan)
+        click.echo(str(estimate), err=True)
+        events.event("schedule", str(estimate), done=estimate.done, total=estimate.total, left=estimate.remaining())
+
+    if jobs > 1:
+        with events.Progress(), ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(download_one, plans))
+    else:
+        for plan in plans:
+            download_one(plan)
+
+
+def download(
+        urls: Iterable[URL],
+        verbose: bool = False,
+        force: bool = False,
+        jobs: int = 1,
+        pipeline: bool = False,
+        schedule: Optional[str] = None,
+        **options,
+) -> None:
+    """Downloads the stories one by one, or ``jobs`` of them at once.
+
+    The URLs are consumed lazily, only a few ahead of the running downloads. Concurrent
+    downloads report aggregated progress instead of every chapter. With ``pipeline``,
+    the main page and cover of the next story are prepared while the current one downloads.
+    With ``schedule``, the stories are downloaded in the order of that policy instead.
+    """
+    urls = (x for x in urls if x.url)
+    if schedule:
+        download_scheduled(urls, verbose, force, jobs, schedule, **options)
+        return
+    if jobs > 1:
+        def download_one(url: URL) -> None:
+            try:
+                download_story(url, False, force, **options)
+            except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+                click.echo(f"Downloading {url.url} failed: {e!r}", err=True)
+
+        slots = threading.BoundedSemaphore(2 * jobs)
+        with events.Progress(), ThreadPoolExecutor(max_workers=jobs) as pool:
+            for url in urls:
+                slots.acquire()
+                pool.submit(download_one, url).add_done_callback(lambda _: slots.release())
+        return
+    if pipeline:
+        download_pipelined(urls, verbose, force, **options)
+        return
+    for url in urls:
+        if not download_story(url, verbose, force, **options):
+            return
+
+
+STORY_OPTIONS = [
+    click.option(
+        "-c",
+        "--compression",
+        type=click.Choice(list(Compression.LEVELS)),
+        default="default",
+        help="How hard to compress the text of the ebook. Images are always stored as they are.",
+    ),
+    click.option(
+        "--fast-write",
+        is_flag=True,
+        default=False,
+        help="Write the ebook directly, without tidying the already cleaned chapters again.",
+    ),
+    click.option(
+        "--minify",
+        is_flag=True,
+        default=False,
+        help="Strip redundant whitespace, empty elements and entities from the chapters.",
+    ),
+    click.option(
+        "--http2",
+        is_flag=True,
+        default=False,
+        help="Fetch sites that allow it, like AO3, over HTTP/2 (needs pyffdl[http2]).",
+    ),
+    click.option(
+        "--images",
+        is_flag=True,
+        default=False,
+        help="Embed the images the chapters link to.",
+    ),
+    click.option("--image-max-size", type=int, help="Scale embedded images down to at most this many pixels."),
+    click.option("--image-quality", type=int, help="Recompress embedded JPEG and WebP images at this quality."),
+    click.option(
+        "--image-budget",
+        type=float,
+        default=20,
+        show_default=True,
+        help="Most megabytes of images to embed per ebook.",
+    ),
+    click.option(
+        "--max-chapters-per-volume",
+        type=click.IntRange(min=1),
+        help="Split the story into volumes of at most this many chapters.",
+    ),
+    click.option(
+        "--max-volume-mb",
+        type=click.FloatRange(min=0, min_open=True),
+        help="Split the story into volumes of at most this many megabytes of text.",
+    ),
+]
+
+BATCH_OPTIONS = [
+    click.option("-j", "--jobs", type=int, default=1, help="Number of stories to download at once."),
+    click.option(
+        "-s",
+        "--schedule",
+        type=click.Choice(list(POLICIES)),
+        help=(
+            "Read all the stories first, then download them shortest or largest first, "
+            "or taking turns between sites."
+        ),
+    ),
+    click.option(
+        "-p",
+        "--pipeline",
+        is_flag=True,
+        default=False,
+        help="Prepare the next story while the current one downloads.",
+    ),
+]
+
+
+def image_options(
+        images: bool, max_size: Optional[int], quality: Optional[int], budget: float
+) -> Optional[ImageOptions]:
+    return ImageOptions(max_size, quality, budget * MEGABYTE) if images else None
+
+
+def story_options(function: Callable) -> Callable:
+    """Adds the options of how stories are fetched and written, passed on as one ``options`` dict."""
+
+    @wraps(function)
+    def wrapper(
+            *args,
+            compression: str,
+            fast_write: bool,
+            minify: bool,
+            http2: bool,
+            images: bool,
+            image_max_size: Optional[int],
+            image_quality: Optional[int],
+            image_budget: float,
+            max_chapters_per_volume: Optional[int],
+            max_volume_mb: Optional[float],
+            **kwargs,
+    ):
+        options = {
+            "compression": compression,
+            "fast_write": fast_write,
+            "minify": minify,
+            "http2": http2,
+            "images": image_options(images, image_max_size, image_quality, image_budget),
+            "max_chapters_per_volume": max_chapters_per_volume,
+            "max_volume_mb": max_volume_mb,
+        }
+        return function(*args, options=options, **kwargs)
+
+    return reduce(lambda x, option: option(x), reversed(STORY_OPTIONS), wrapper)
+
+
+def batch_options(function: Callable) -> Callable:
+    """Adds the options of how a batch of stories is downloaded."""
+    return reduce(lambda x, option: option(x), reversed(BATCH_OPTIONS), function)
 
 
 @click.group()
 @click.version_option(version=__version__)
-def cli() -> None:
-    pass
+@click.option(
+    "--log-file",
+    type=click.Path(dir_okay=False),
+    default=events.DEFAULT_LOG,
+    envvar="PYFFDL_LOG",
+    help="File to write the JSON lines event log into.",
+)
+def cli(log_file: str) -> None:
+    # The parsers warn about the sites' markup all the time. The filter is set once here,
+    # as catch_warnings() isn't safe while several stories download in threads.
+    warnings.simplefilter("ignore")
+    events.configure(log_file)
 
 
 @cli.command(  # noqa: unused-function
@@ -65,17 +310,21 @@ def cli() -> None:
     type=click.File(),
     help="Load a list of URLs from a plaintext file.",
 )
+@story_options
+@batch_options
 @click.option("-v", "--verbose", is_flag=True)
 @click.argument("url_list", nargs=-1)
 def cli_download(
-        from_file: click.File, url_list: tuple[str, ...], verbose: bool = False
+        from_file: click.File,
+        options: Dict[str, Any],
+        jobs: int,
+        schedule: Optional[str],
+        pipeline: bool,
+        url_list: tuple[str, ...],
+        verbose: bool = False,
 ) -> None:
-    urls = [URL(furl(x)) for x in url_list]
-    if from_file:
-        urls += [
-            URL(furl(x.strip("\n"))) for x in from_file.readlines() if not x.startswith("#")
-        ]
-    download(urls, verbose)
+    urls = unique_urls(read_urls(chain(url_list, from_file or ())))
+    download((URL(furl(x)) for x in urls), verbose, jobs=jobs, pipeline=pipeline, schedule=schedule, **options)
 
 
 @cli.command(  # noqa: unused-function
@@ -107,13 +356,7 @@ def cli_html(
     if not urls:
         click.echo("You must provide at least one URL to download.")
         return
-    story = HTMLStory(
-        chapters=[x.url.tostr() for x in urls],
-        author=author,
-        title=title,
-        url=furl("https://httpbin.org/status/200"),
-    )
-    story.verbose = verbose
+    story = HTMLStory.from_chapters([x.url.tostr() for x in urls], author, title, verbose=verbose)
     story.run()
 
 
@@ -130,15 +373,263 @@ def cli_html(
 @click.option(
     "-b", "--backup", is_flag=True, default=False, help="Backup the original file."
 )
+@click.option(
+    "--keep-backups",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="How many generations of backups to keep.",
+)
+@click.option(
+    "-r",
+    "--revalidate",
+    is_flag=True,
+    default=False,
+    help="Check already downloaded chapters for changes and refetch only the edited ones.",
+)
+@story_options
+@batch_options
 @click.option("-v", "--verbose", is_flag=True)
 @click.argument("filenames", type=click.Path(dir_okay=False, exists=True), nargs=-1)
 def cli_update(
-        force: bool, backup: bool, filenames: list[click.Path], verbose: bool = False
+        force: bool,
+        backup: bool,
+        keep_backups: int,
+        revalidate: bool,
+        options: Dict[str, Any],
+        jobs: int,
+        schedule: Optional[str],
+        pipeline: bool,
+        filenames: list[click.Path],
+        verbose: bool = False,
 ) -> None:
     if backup:
         for filename in filenames:
-            shutil.copy(f"{filename}", f"{filename}.bck")
+            files.backup(last_volume(filename) or filename, keep_backups)
     stories = [
         URL(get_url_from_file(x), str(x) if not force else None) for x in filenames
     ]
-    download(stories, verbose, force)
+    download(
+        stories,
+        verbose,
+        force,
+        jobs=jobs,
+        pipeline=pipeline,
+        schedule=schedule,
+        revalidate=revalidate,
+        **options,
+    )
+
+
+@cli.command(  # noqa: unused-function
+    "metadata", help="Print the metadata of stories as JSON lines, without downloading them."
+)
+@click.option(
+    "-f",
+    "--from",
+    "from_file",
+    type=click.File(),
+    help="Load a list of URLs from a plaintext file.",
+)
+@click.option("-j", "--jobs", type=int, default=8, help="Number of stories to fetch at once.")
+@click.option("-o", "--output", type=click.File("w"), default="-", help="File to write the JSON lines into.")
+@click.argument("url_list", nargs=-1)
+def cli_metadata(from_file: click.File, jobs: int, output: click.File, url_list: tuple[str, ...]) -> None:
+    export_metadata(unique_urls(read_urls(chain(url_list, from_file or ()))), output, jobs)
+
+
+@cli.command(  # noqa: unused-function
+    "check", help="Check ebooks for new chapters without updating them."
+)
+@click.option("-j", "--jobs", type=int, default=8, help="Number of stories to check at once.")
+@click.option("--format", "fmt", type=click.Choice(["json", "csv"]), default="json", help="Format of the report.")
+@click.option("-a", "--all", "show_all", is_flag=True, default=False, help="Report up-to-date ebooks too.")
+@click.option("-o", "--output", type=click.File("w"), default="-", help="File to write the report into.")
+@click.argument("paths", type=click.Path(exists=True), nargs=-1, required=True)
+def cli_check(jobs: int, fmt: str, show_all: bool, output: click.File, paths: tuple[str, ...]) -> None:
+    statuses = check(paths, jobs)
+    write_report([x for x in statuses if show_all or x.stale or x.error], output, fmt)
+    click.echo(
+        f"Checked {len(statuses)} ebooks: {sum(x.stale for x in statuses)} with new chapters, "
+        f"{sum(bool(x.error) for x in statuses)} failed.",
+        err=True,
+    )
+
+
+@cli.group("watch", help="Watch in-progress stories and download new chapters as they appear.")
+@click.option(
+    "-w",
+    "--watchlist",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Watchlist file to use instead of the one in the application folder.",
+)
+@click.pass_context
+def cli_watch(ctx: click.Context, watchlist: Optional[str]) -> None:
+    ctx.obj = Watchlist.load(watchlist or default_watchlist())
+
+
+@cli_watch.command("add", help="Add story URLs or existing .epub files to the watchlist.")  # noqa: unused-function
+@click.argument("items", nargs=-1, required=True)
+@click.pass_obj
+def cli_watch_add(watchlist: Watchlist, items: tuple[str, ...]) -> None:
+    for item in items:
+        if item.endswith(".epub") and Path(item).exists():
+            url = get_url_from_file(item)
+            if url:
+                watchlist.add(url.tostr(), str(Path(item).resolve()))
+        else:
+            watchlist.add(furl(item).tostr())
+    watchlist.save()
+
+
+@cli_watch.command("remove", help="Stop watching the given story URLs.")  # noqa: unused-function
+@click.argument("urls", nargs=-1, required=True)
+@click.pass_obj
+def cli_watch_remove(watchlist: Watchlist, urls: tuple[str, ...]) -> None:
+    for url in urls:
+        if not watchlist.remove(furl(url).tostr()):
+            click.echo(f"{url} isn't being watched.", err=True)
+    watchlist.save()
+
+
+@cli_watch.command("list", help="Show the watched stories and when they're checked next.")  # noqa: unused-function
+@click.pass_obj
+def cli_watch_list(watchlist: Watchlist) -> None:
+    for story in sorted(watchlist.stories.values(), key=lambda x: (x.dormant, x.next_check)):
+        when = "dormant" if story.dormant else pendulum.from_timestamp(story.next_check).diff_for_humans()
+        click.echo(f"{story.url} ({story.chapters} chapters) - {when}")
+
+
+@cli_watch.command("run", help="Keep checking the watched stories when they're due.")  # noqa: unused-function
+@click.option("-j", "--jobs", type=int, default=4, help="Number of stories to check at once.")
+@click.option("--once", is_flag=True, default=False, help="Only run the checks that are due now.")
+@click.option("-v", "--verbose", is_flag=True)
+@click.pass_obj
+def cli_watch_run(watchlist: Watchlist, jobs: int, once: bool, verbose: bool = False) -> None:
+    try:
+        watch(watchlist, jobs, verbose, once)
+    except KeyboardInterrupt:
+        watchlist.save()
+
+
+@cli.command(  # noqa: unused-function
+    "serve", help="Run a local HTTP API that downloads and updates stories on request."
+)
+@click.option("-h", "--host", default="127.0.0.1", help="Address to listen on.")
+@click.option("-p", "--port", type=int, default=8080, help="Port to listen on.")
+@click.option("-j", "--jobs", type=int, default=4, help="Number of jobs to run at once.")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(file_okay=False, exists=True),
+    default=".",
+    help="Folder to store newly downloaded ebooks in.",
+)
+@click.option(
+    "--keep-jobs",
+    type=click.IntRange(min=0),
+    default=1000,
+    show_default=True,
+    help="Number of finished jobs to remember the status of.",
+)
+@story_options
+def cli_serve(
+        host: str,
+        port: int,
+        jobs: int,
+        output: str,
+        keep_jobs: int,
+        options: Dict[str, Any],
+) -> None:
+    manager = JobManager(output, jobs, options, keep_jobs)
+    server = make_server(host, port, manager)
+    click.echo(f"Listening on http://{host}:{server.server_port}/jobs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+
+
+@cli.group("queue", help="Share download jobs between several machines through an SQLite file.")
+@click.option(
+    "-d",
+    "--database",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="Queue database, usually on a volume shared by all the workers.",
+)
+@click.pass_context
+def cli_queue(ctx: click.Context, database: str) -> None:
+    ctx.obj = JobQueue(database)
+
+
+@cli_queue.command("add", help="Queue story URLs to download, or .epub files to update.")  # noqa: unused-function
+@click.option(
+    "-f",
+    "--from",
+    "from_file",
+    type=click.File(),
+    help="Load a list of URLs from a plaintext file.",
+)
+@click.option("--force", is_flag=True, default=False, help="Completely refresh the updated ebook files.")
+@click.option("--attempts", type=int, default=3, help="How many times to try each job.")
+@click.argument("items", nargs=-1)
+@click.pass_obj
+def cli_queue_add(
+        queue: JobQueue, from_file: click.File, force: bool, attempts: int, items: tuple[str, ...]
+) -> None:
+    for item in unique_urls(read_urls(chain(items, from_file or ()))):
+        if item.endswith(".epub") and Path(item).exists():
+            queue.add("update", file=str(Path(item).resolve()), force=force, max_attempts=attempts)
+        else:
+            queue.add("download", url=item, max_attempts=attempts)
+
+
+@cli_queue.command("work", help="Claim and run queued jobs.")  # noqa: unused-function
+@click.option("-j", "--jobs", type=int, default=1, help="Number of jobs to run at once.")
+@click.option("--lease", type=int, default=DEFAULT_LEASE, help="Seconds a claimed job stays reserved.")
+@click.option("--once", is_flag=True, default=False, help="Stop when the queue is empty.")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(file_okay=False, exists=True),
+    default=".",
+    help="Folder to store newly downloaded ebooks in.",
+)
+@click.option("-v", "--verbose", is_flag=True)
+@click.pass_obj
+def cli_queue_work(
+        queue: JobQueue, jobs: int, lease: int, once: bool, output: str, verbose: bool = False
+) -> None:
+    work(queue, jobs, lease, once, verbose, output_dir=output)
+
+
+@cli_queue.command("status", help="Show the state of the queue.")  # noqa: unused-function
+@click.option("--failed", is_flag=True, default=False, help="List the failed jobs and their errors.")
+@click.pass_obj
+def cli_queue_status(queue: JobQueue, failed: bool) -> None:
+    for status, count in sorted(queue.counts().items()):
+        click.echo(f"{status}: {count}")
+    if failed:
+        for job in queue.jobs("failed"):
+            click.echo(f"{job.id} {job.url or job.file}: {job.error}")
+
+
+@cli.command(  # noqa: unused-function
+    "author", help="Download all stories from an author's profile page."
+)
+@click.option("-j", "--jobs", type=int, default=4, help="Number of stories to download at once.")
+@story_options
+@click.option("-v", "--verbose", is_flag=True)
+@click.argument("url")
+def cli_author(url: str, jobs: int, options: Dict[str, Any], verbose: bool = False) -> None:
+    try:
+        works = author_works(furl(url))
+    except AuthorError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Found {len(works)} stories.")
+    download([URL(x) for x in works], verbose, jobs=jobs, **options)
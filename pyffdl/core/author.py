@@ -0,0 +1,31 @@
+from typing import List, Optional
+
+from bs4 import BeautifulSoup  # type: ignore
+from furl import furl  # type: ignore
+
+from pyffdl.sites import get_site
+from pyffdl.sites.story import DEFAULT_SESSION
+from pyffdl.utilities.cookies import cookie_store
+from pyffdl.utilities.transport import SessionTransport, Transport
+
+
+class AuthorError(ValueError):
+    pass
+
+
+def author_works(url: furl, transport: Optional[Transport] = None) -> List[furl]:
+    """Lists all stories on an author's profile, fetching every page of the listing once."""
+    if transport is None:
+        transport = SessionTransport(DEFAULT_SESSION, cookie_store())
+    site = get_site(url)
+    page_url = site.author_works_url(url) if site else None
+    if not page_url:
+        raise AuthorError(f"{url} isn't an author page pyffdl knows how to read.")
+    works: List[furl] = []
+    while page_url:
+        response = transport.get(page_url.url)
+        if not response.ok:
+            raise AuthorError(f"I couldn't establish connection to {page_url}.\n{response.status_code}")
+        found, page_url = site.list_works(BeautifulSoup(response.content, "html5lib"), page_url)
+        works += [x for x in found if x not in works]
+    return works
@@ -0,0 +1,119 @@
+"""Checks ebooks for new chapters by fetching only the stories' main pages."""
+import csv
+import json
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import attr
+from bs4 import BeautifulSoup  # type: ignore
+from furl import furl  # type: ignore
+
+from pyffdl.sites import get_site
+from pyffdl.sites.story import last_volume
+from pyffdl.utilities.chapters import INDEX_FILE
+
+CHAPTER_FILE = re.compile(r"(?:^|/)chapter\d+\.xhtml$")
+TITLE_FILES = ("title.xhtml", "nav.xhtml")
+# The title page's element holding the story URL, and what older versions called it.
+URL_IDS = ("url", "story-url")
+FIELDS = ("file", "url", "stored", "current", "new", "error")
+
+
+@attr.s(auto_attribs=True)
+class BookStatus:
+    file: str
+    url: Optional[str] = None
+    stored: int = 0
+    current: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def new(self) -> Optional[int]:
+        return None if self.current is None else self.current - self.stored
+
+    @property
+    def stale(self) -> bool:
+        return bool(self.new and self.new > 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {**attr.asdict(self), "new": self.new}
+        return {x: data[x] for x in FIELDS}
+
+
+def find_books(paths: Iterable[Path]) -> Iterator[Path]:
+    """Yields the given ebooks, and all ebooks in the given folders.
+
+    Of a story split into volumes, only the last volume is checked.
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from (x for x in sorted(path.rglob("*.epub")) if last_volume(x) in (None, x))
+        else:
+            yield path
+
+
+def read_book(path: Path) -> Tuple[Optional[furl], int]:
+    """Returns the story URL and the number of chapters stored in an ebook, without parsing all of it."""
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        chapters = sum(1 for x in names if CHAPTER_FILE.search(x))
+        index = next((x for x in names if x == INDEX_FILE or x.endswith(f"/{INDEX_FILE}")), None)
+        if index:
+            chapters += json.loads(archive.read(index)).get("volume", {}).get("first", 1) - 1
+        for title in TITLE_FILES:
+            name = next((x for x in names if x == title or x.endswith(f"/{title}")), None)
+            if not name:
+                continue
+            page = BeautifulSoup(archive.read(name), "xml")
+            found = next((x for x in (page.find(id=y) for y in URL_IDS) if x), page)
+            links = found("a", href=True)
+            if links:
+                return furl(links[0]["href"]), chapters
+    return None, chapters
+
+
+def check_book(path: Path, **options) -> BookStatus:
+    """Compares the chapters stored in the ebook with the chapter list on the site."""
+    status = BookStatus(str(path))
+    try:
+        url, status.stored = read_book(path)
+    except (OSError, zipfile.BadZipFile) as e:
+        status.error = f"Can't read the ebook: {e}"
+        return status
+    if not url:
+        status.error = "The ebook doesn't contain the story URL."
+        return status
+    status.url = url.tostr()
+    site = get_site(url)
+    if not site:
+        status.error = "The site isn't supported."
+        return status
+    try:
+        story = site.parse(url, False, False, **options)
+        story.get_chapters()
+        status.current = len(story.metadata.chapters)
+    except SystemExit:
+        status.error = "I couldn't fetch the story page."
+    except Exception as e:  # pylint:disable=broad-except
+        status.error = repr(e)
+    return status
+
+
+def check(paths: Iterable[Path], jobs: int = 8, **options) -> List[BookStatus]:
+    """Checks all the ebooks, fetching ``jobs`` main pages at once."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(lambda x: check_book(x, **options), find_books(paths)))
+
+
+def write_report(statuses: Iterable[BookStatus], fp: TextIO, fmt: str = "json") -> None:
+    rows = [x.to_dict() for x in statuses]
+    if fmt == "csv":
+        writer = csv.DictWriter(fp, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        json.dump(rows, fp, indent=1)
+        fp.write("\n")
@@ -0,0 +1,47 @@
+"""Exports the metadata of many stories as JSON lines, fetching only their main pages."""
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, TextIO
+
+from furl import furl  # type: ignore
+
+from pyffdl.sites import get_site
+
+
+def story_metadata(url: str, **options) -> Dict[str, Any]:
+    """Returns the metadata of a story, or its URL and the error that stopped it."""
+    site = get_site(furl(url))
+    if not site:
+        return {"url": url, "error": "The site isn't supported."}
+    try:
+        story = site.parse(furl(url), False, False, **options)
+        story.make_title_page()
+        story.get_chapters()
+        return story.metadata.to_dict()
+    except SystemExit:
+        return {"url": url, "error": "I couldn't fetch the story page."}
+    except Exception as e:  # pylint:disable=broad-except
+        return {"url": url, "error": repr(e)}
+
+
+def export_metadata(urls: Iterable[str], fp: TextIO, jobs: int = 8, **options) -> None:
+    """Writes a JSON line for each story as soon as it's parsed, ``jobs`` stories at a time.
+
+    The URLs are consumed lazily, and the lines come out in the order the stories finish.
+    """
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(2 * jobs)
+
+    def write(future: Future) -> None:
+        try:
+            with lock:
+                fp.write(json.dumps(future.result(), default=str) + "\n")
+                fp.flush()
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for url in urls:
+            slots.acquire()
+            pool.submit(story_metadata, url, **options).add_done_callback(write)
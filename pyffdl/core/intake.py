@@ -0,0 +1,84 @@
+"""Streams story URLs from long lists, dropping repeated stories as it goes.
+
+Each URL is reduced to a key naming the story on its site, so chapter URLs and other
+variants of a story already seen are skipped. The keys are kept as 64-bit hashes in a
+compact open-addressing table, which stays small even for millions of stories.
+"""
+import hashlib
+from array import array
+from typing import Iterable, Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from pyffdl.sites import SITES
+
+
+class SeenSet:
+    """Set of string keys, stored as 8-byte hashes in a flat array."""
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.slots = array("Q", bytes(8 * capacity))
+
+    @staticmethod
+    def digest(key: str) -> int:
+        value = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        return value or 1
+
+    def find(self, value: int) -> int:
+        mask = len(self.slots) - 1
+        index = value & mask
+        while self.slots[index] and self.slots[index] != value:
+            index = (index + 1) & mask
+        return index
+
+    def grow(self) -> None:
+        old = self.slots
+        self.slots = array("Q", bytes(16 * len(old)))
+        for value in old:
+            if value:
+                self.slots[self.find(value)] = value
+
+    def add(self, key: str) -> bool:
+        """Adds the key, returns ``False`` if it was already there."""
+        value = self.digest(key)
+        index = self.find(value)
+        if self.slots[index]:
+            return False
+        self.slots[index] = value
+        self.size += 1
+        if self.size * 2 > len(self.slots):
+            self.grow()
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.slots[self.find(self.digest(key))])
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def read_urls(lines: Iterable[str]) -> Iterator[str]:
+    """Yields the URLs in a list, one per line, skipping blank lines and comments."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def story_key(url: str) -> str:
+    """Returns a key that is the same for all URLs of a story."""
+    parts = urlsplit(url)
+    host = SITES.match(parts.hostname or "")
+    site = SITES.for_host(host) if host else None
+    story_id = site.story_id(url) if site else None
+    if story_id:
+        return f"{host}:{story_id}"
+    return urlunsplit(parts._replace(netloc=parts.netloc.lower(), fragment="")).rstrip("/")
+
+
+def unique_urls(urls: Iterable[str]) -> Iterator[str]:
+    """Yields the first URL of every story, lazily."""
+    seen = SeenSet()
+    for url in urls:
+        if seen.add(story_key(url)):
+            yield url
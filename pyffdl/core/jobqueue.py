@@ -0,0 +1,221 @@
+"""Job queue in an SQLite file, shared by workers on several machines.
+
+Workers lease jobs for a limited time and keep renewing the lease while they run them.
+A job whose worker died becomes available again once its lease runs out, and failed
+jobs are retried until they run out of attempts.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import attr
+import click
+
+from pyffdl.core.jobs import KINDS, JobError, run_job
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    url TEXT,
+    file TEXT,
+    force INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until);
+"""
+
+DEFAULT_LEASE = 600
+POLL_INTERVAL = 5
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+@attr.s(auto_attribs=True)
+class QueuedJob:
+    id: int
+    kind: str
+    url: Optional[str]
+    file: Optional[str]
+    force: bool
+    status: str
+    attempts: int
+    max_attempts: int
+    worker: Optional[str]
+    lease_until: Optional[float]
+    result: Optional[str]
+    error: Optional[str]
+    created: float
+    updated: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueuedJob":
+        return cls(**{**dict(row), "force": bool(row["force"])})
+
+
+@attr.s
+class JobQueue:
+    path: Path = attr.ib(converter=Path)
+    timeout: float = attr.ib(default=30)
+
+    def __attrs_post_init__(self):
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def add(self, kind: str, url: Optional[str] = None, file: Optional[str] = None,
+            force: bool = False, max_attempts: int = 3) -> int:
+        if kind not in KINDS:
+            raise JobError(f"Unknown job kind '{kind}', use one of {', '.join(KINDS)}.")
+        now = time.time()
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (kind, url, file, force, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, url, file, int(force), max_attempts, now, now),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: str, lease: float = DEFAULT_LEASE) -> Optional[QueuedJob]:
+        """Leases the oldest available job to the worker."""
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Lease expired too many times', updated = ? "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = connection.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row:
+                    connection.execute(
+                        "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (worker, now + lease, now, row["id"]),
+                    )
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            return self.get(row["id"], connection) if row else None
+
+    def get(self, job_id: int, connection: Optional[sqlite3.Connection] = None) -> Optional[QueuedJob]:
+        if not connection:
+            with self.connect() as connection:
+                return self.get(job_id, connection)
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return QueuedJob.from_row(row) if row else None
+
+    def renew(self, job_id: int, worker: str, lease: float = DEFAULT_LEASE) -> bool:
+        """Extends the lease, returns ``False`` if the job was taken over by someone else."""
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease, time.time(), job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: str) -> None:
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated = ? "
+                "WHERE id = ? AND worker = ?",
+                (result, time.time(), job_id, worker),
+            )
+
+    def fail(self, job_id: int, worker: str, error: str) -> None:
+        """Records the error and puts the job back in the queue if it has attempts left."""
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END, "
+                "error = ?, lease_until = NULL, updated = ? WHERE id = ? AND worker = ?",
+                (error, time.time(), job_id, worker),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self.connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["n"] for row in rows}
+
+    def jobs(self, status: Optional[str] = None) -> List[QueuedJob]:
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE ? IS NULL OR status = ? ORDER BY id", (status, status)
+            ).fetchall()
+            return [QueuedJob.from_row(row) for row in rows]
+
+
+def process(queue: JobQueue, job: QueuedJob, worker: str, lease: float, verbose: bool = False, **options) -> None:
+    """Runs a claimed job, renewing its lease until it's finished."""
+    finished = threading.Event()
+
+    def keep_alive():
+        while not finished.wait(lease / 3):
+            if not queue.renew(job.id, worker, lease):
+                return
+
+    renewer = threading.Thread(target=keep_alive, daemon=True)
+    renewer.start()
+    try:
+        story = run_job(job.kind, job.url, job.file, job.force, verbose, **options)
+        queue.complete(job.id, worker, str(Path(story.filename).resolve()))
+        click.echo(f"Job {job.id} done: {story.filename}")
+    except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+        queue.fail(job.id, worker, repr(e))
+        click.echo(f"Job {job.id} failed: {e!r}", err=True)
+    finally:
+        finished.set()
+        renewer.join()
+
+
+def work(queue: JobQueue, jobs: int = 1, lease: float = DEFAULT_LEASE, once: bool = False,
+         verbose: bool = False, **options) -> None:
+    """Claims and runs jobs with ``jobs`` workers.
+
+    With ``once``, the workers stop as soon as the queue is empty, otherwise they keep
+    polling for new jobs.
+    """
+
+    def worker_loop():
+        worker = worker_name()
+        while True:
+            job = queue.claim(worker, lease)
+            if job:
+                process(queue, job, worker, lease, verbose, **options)
+            elif once:
+                return
+            else:
+                time.sleep(POLL_INTERVAL)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for future in [pool.submit(worker_loop) for _ in range(jobs)]:
+            future.result()
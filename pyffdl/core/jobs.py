@@ -0,0 +1,35 @@
+from typing import Optional
+
+from furl import furl  # type: ignore
+
+from pyffdl.sites import get_site
+from pyffdl.sites.story import Story
+from pyffdl.utilities import get_url_from_file
+
+KINDS = ("download", "update")
+
+
+class JobError(ValueError):
+    pass
+
+
+def run_job(
+    kind: str,
+    url: Optional[str] = None,
+    file: Optional[str] = None,
+    force: bool = False,
+    verbose: bool = False,
+    **options,
+) -> Story:
+    """Downloads a new story or updates an existing ebook, and returns the finished story."""
+    if kind not in KINDS:
+        raise JobError(f"Unknown job kind '{kind}', use one of {', '.join(KINDS)}.")
+    story_url = furl(url) if kind == "download" else get_url_from_file(file)
+    site = get_site(story_url) if story_url else None
+    if not site:
+        raise JobError(f"Can't download from {url or file}.")
+    story = site.parse(story_url, verbose, force, **options)
+    if kind == "update" and not force:
+        story.filename = file
+    story.run()
+    return story
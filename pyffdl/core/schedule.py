@@ -0,0 +1,101 @@
+"""Orders the stories of a batch by how much there is to download, and estimates when it'll be done.
+
+Once a story's main page is parsed, its word and chapter counts tell how expensive
+fetching its chapters will be. Short stories first gets the most stories finished
+early, largest first packs parallel downloads best, and round robin takes turns
+between the sites, so no site gets all the requests at once.
+"""
+import threading
+import time
+from itertools import chain, zip_longest
+from typing import Any, Callable, Dict, List, Optional
+
+import attr
+
+# Words assumed for a chapter of a story whose site doesn't count its words.
+CHAPTER_WORDS = 3000
+
+
+@attr.s(auto_attribs=True)
+class Planned:
+    """A story to download and the cost of the chapters it still lacks.
+
+    Only the story's URL and the content of its main page are kept, not the story
+    itself, so planning a large batch doesn't hold every parsed page in memory, and
+    the page isn't fetched again when the story is downloaded.
+    """
+
+    url: Any
+    site: str
+    words: int
+    chapters: int
+    page: Optional[bytes] = attr.ib(default=None, repr=False)
+
+    @classmethod
+    def from_story(cls, url: Any, story: Any, stored: int = 0) -> "Planned":
+        """Plans a story whose chapter list is parsed and whose ebook has ``stored`` chapters."""
+        total = len(story.metadata.chapters)
+        missing = max(total - stored, 0)
+        if story.metadata.words and total:
+            words = story.metadata.words * missing // total
+        else:
+            words = missing * CHAPTER_WORDS
+        return cls(url, story.url.host or "", words, missing, story.main_page)
+
+
+def shortest_first(plans: List[Planned]) -> List[Planned]:
+    return sorted(plans, key=lambda x: x.words)
+
+
+def largest_first(plans: List[Planned]) -> List[Planned]:
+    return sorted(plans, key=lambda x: x.words, reverse=True)
+
+
+def round_robin(plans: List[Planned]) -> List[Planned]:
+    """Takes one story from each site in turn, keeping the stories of a site in order."""
+    sites: Dict[str, List[Planned]] = {}
+    for plan in plans:
+        sites.setdefault(plan.site, []).append(plan)
+    return [x for x in chain.from_iterable(zip_longest(*sites.values())) if x]
+
+
+POLICIES: Dict[str, Callable[[List[Planned]], List[Planned]]] = {
+    "shortest": shortest_first,
+    "largest": largest_first,
+    "round-robin": round_robin,
+}
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02}m" if hours else f"{minutes}m {seconds:02}s"
+
+
+@attr.s
+class Estimate:
+    """Estimates the time left from the rate the finished stories were downloaded at."""
+
+    total: int = attr.ib()
+    stories: int = attr.ib()
+    done: int = attr.ib(default=0)
+    finished: int = attr.ib(default=0)
+    started: float = attr.ib(factory=time.monotonic)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def finish(self, plan: Planned) -> None:
+        with self._lock:
+            self.done += plan.words
+            self.finished += 1
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left at the rate so far, or ``None`` until there's a rate to go by."""
+        elapsed = time.monotonic() - self.started
+        if not self.done or not elapsed:
+            return None
+        return (self.total - self.done) * elapsed / self.done
+
+    def __str__(self) -> str:
+        remaining = self.remaining()
+        left = f", about {format_duration(remaining)} left" if remaining is not None else ""
+        return f"{self.finished}/{self.stories} stories, {self.done:,}/{self.total:,} words{left}"
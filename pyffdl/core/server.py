@@ -0,0 +1,160 @@
+"""Small local HTTP API that runs download and update jobs on a pool of workers.
+
+    POST /jobs              {"kind": "download", "url": ...} or {"kind": "update", "file": ..., "force": false}
+    GET  /jobs              status of all jobs
+    GET  /jobs/<id>         status of one job
+    GET  /jobs/<id>/epub    the finished ebook
+"""
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+from uuid import uuid4
+
+import attr
+
+from pyffdl.core.jobs import KINDS, JobError, run_job
+
+
+@attr.s(auto_attribs=True)
+class Job:
+    kind: str
+    url: Optional[str] = None
+    file: Optional[str] = None
+    force: bool = False
+    id: str = attr.ib(factory=lambda: uuid4().hex)
+    status: str = "queued"
+    error: Optional[str] = None
+    created: float = attr.ib(factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return attr.asdict(self)
+
+
+@attr.s
+class JobManager:
+    """Runs jobs on a persistent pool, so sessions, styles and covers stay warm between them.
+
+    Only the ``keep`` most recently finished jobs are remembered.
+    """
+
+    output_dir: str = attr.ib(default="")
+    jobs: int = attr.ib(default=4)
+    options: Dict[str, Any] = attr.ib(factory=dict)
+    keep: int = attr.ib(default=1000)
+    _pool: ThreadPoolExecutor = attr.ib(init=False)
+    _jobs: Dict[str, Job] = attr.ib(init=False, factory=dict)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock)
+
+    def __attrs_post_init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.jobs)
+
+    def submit(self, data: Dict[str, Any]) -> Job:
+        kind = data.get("kind", "download")
+        if kind not in KINDS:
+            raise JobError(f"Unknown job kind '{kind}', use one of {', '.join(KINDS)}.")
+        if kind == "download" and not data.get("url"):
+            raise JobError("A download job needs a 'url'.")
+        if kind == "update" and not (data.get("file") and Path(data["file"]).is_file()):
+            raise JobError("An update job needs the 'file' of an existing ebook.")
+        job = Job(kind, url=data.get("url"), file=data.get("file"), force=bool(data.get("force")))
+        with self._lock:
+            self.prune()
+            self._jobs[job.id] = job
+        self._pool.submit(self.run, job)
+        return job
+
+    def prune(self) -> None:
+        """Forgets the oldest finished jobs beyond the ``keep`` most recent ones."""
+        finished = sorted((x for x in self._jobs.values() if x.finished), key=lambda x: x.finished)
+        for job in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def all(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def run(self, job: Job) -> None:
+        job.status, job.started = "running", time.time()
+        try:
+            story = run_job(
+                job.kind, job.url, job.file, job.force, output_dir=self.output_dir, **self.options
+            )
+            job.file = str(Path(story.filename).resolve())
+            job.url = job.url or story.url.tostr()
+            job.status = "done"
+        except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+            job.status, job.error = "failed", repr(e)
+        finally:
+            job.finished = time.time()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    manager: JobManager
+
+    def log_message(self, format, *args):  # pylint:disable=redefined-builtin
+        pass
+
+    def send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: HTTPStatus, message: str) -> None:
+        self.send_json({"error": message}, status)
+
+    def do_POST(self):  # noqa: N802
+        if self.path.rstrip("/") != "/jobs":
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "Not found.")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            job = self.manager.submit(data)
+        except (ValueError, AttributeError) as e:
+            return self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+        return self.send_json(job.to_dict(), HTTPStatus.ACCEPTED)
+
+    def do_GET(self):  # noqa: N802
+        if self.path.rstrip("/") == "/jobs":
+            return self.send_json([x.to_dict() for x in self.manager.all()])
+        match = re.fullmatch(r"/jobs/(?P<id>\w+)(?P<epub>/epub)?/?", self.path)
+        job = self.manager.get(match.group("id")) if match else None
+        if not job:
+            return self.send_error_json(HTTPStatus.NOT_FOUND, "No such job.")
+        if not match.group("epub"):
+            return self.send_json(job.to_dict())
+        if job.status != "done":
+            return self.send_error_json(HTTPStatus.CONFLICT, f"Job is {job.status}.")
+        path = Path(job.file)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/epub+zip")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(path.name)}")
+        self.end_headers()
+        with path.open("rb") as fp:
+            while chunk := fp.read(1 << 16):
+                self.wfile.write(chunk)
+        return None
+
+
+def make_server(host: str, port: int, manager: JobManager) -> ThreadingHTTPServer:
+    handler = type("Handler", (JobRequestHandler,), {"manager": manager})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,180 @@
+"""Long-running watch mode that checks stories as often as they tend to update."""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import attr
+import click
+from furl import furl  # type: ignore
+
+from pyffdl.sites import get_site
+from pyffdl.sites.story import Metadata
+from pyffdl.utilities.misc import APP
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+MIN_INTERVAL = HOUR
+MAX_INTERVAL = 30 * DAY
+DEFAULT_INTERVAL = DAY
+POLL_INTERVAL = 60
+
+
+def default_watchlist() -> Path:
+    return Path(click.get_app_dir(APP)) / "watchlist.json"
+
+
+def check_interval(metadata: Metadata, now: float) -> float:
+    """Estimates how long to wait before checking a story for new chapters again.
+
+    Stories are checked about twice per their usual gap between chapters, backing off
+    the longer they've been idle.
+    """
+    last = metadata.updated or metadata.published
+    if not last or last.year <= 1970:
+        return DEFAULT_INTERVAL
+    last_update = last.timestamp()
+    cadence: float = DEFAULT_INTERVAL
+    chapters = len(metadata.chapters)
+    if metadata.published and chapters > 1 and last_update > metadata.published.timestamp():
+        cadence = (last_update - metadata.published.timestamp()) / (chapters - 1)
+    idle = max(now - last_update, 0)
+    return min(max(cadence / 2, idle / 4, MIN_INTERVAL), MAX_INTERVAL)
+
+
+@attr.s(auto_attribs=True)
+class WatchedStory:
+    url: str
+    file: Optional[str] = None
+    chapters: int = 0
+    interval: float = DEFAULT_INTERVAL
+    next_check: float = 0.0
+    last_checked: Optional[float] = None
+    dormant: bool = False
+
+    def is_due(self, now: float) -> bool:
+        return not self.dormant and self.next_check <= now
+
+
+@attr.s
+class Watchlist:
+    path: Path = attr.ib(converter=Path)
+    stories: Dict[str, WatchedStory] = attr.ib(factory=dict)
+    lock: threading.Lock = attr.ib(factory=threading.Lock, eq=False, repr=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "Watchlist":
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        with path.open() as fp:
+            data = json.load(fp)
+        return cls(path, {x["url"]: WatchedStory(**x) for x in data.get("stories", [])})
+
+    def save(self) -> None:
+        with self.lock:
+            data = {"stories": [attr.asdict(x) for x in self.stories.values()]}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        with temporary.open("w") as fp:
+            json.dump(data, fp, indent=1)
+        os.replace(temporary, self.path)
+
+    def refresh(self) -> None:
+        """Picks up stories added to or removed from the file by other processes."""
+        on_disk = self.load(self.path).stories
+        with self.lock:
+            for url in set(self.stories) - set(on_disk):
+                del self.stories[url]
+            for url, story in on_disk.items():
+                self.stories.setdefault(url, story)
+
+    def add(self, url: str, file: Optional[str] = None) -> WatchedStory:
+        with self.lock:
+            story = self.stories.setdefault(url, WatchedStory(url))
+            story.file = file or story.file
+            story.dormant = False
+            story.next_check = 0.0
+        return story
+
+    def remove(self, url: str) -> bool:
+        with self.lock:
+            return self.stories.pop(url, None) is not None
+
+    def due(self, now: float) -> List[WatchedStory]:
+        with self.lock:
+            return sorted(
+                (x for x in self.stories.values() if x.is_due(now)), key=lambda x: x.next_check
+            )
+
+    def next_due(self) -> Optional[float]:
+        with self.lock:
+            pending = [x.next_check for x in self.stories.values() if not x.dormant]
+        return min(pending) if pending else None
+
+
+def check_story(watchlist: Watchlist, entry: WatchedStory, verbose: bool = False, **options) -> None:
+    """Checks one story and downloads it if it has new chapters."""
+    url = furl(entry.url)
+    site = get_site(url)
+    if not site:
+        click.echo(f"{entry.url} isn't supported, it won't be checked again.", err=True)
+        with watchlist.lock:
+            entry.dormant = True
+        return
+    try:
+        story = site.parse(url, verbose, False, **options)
+        if entry.file:
+            story.filename = entry.file
+        story.prepare()
+        story.list_chapters()
+        chapters = len(story.metadata.chapters)
+        if chapters != entry.chapters or not (entry.file and Path(entry.file).exists()):
+            story.run()
+        now = time.time()
+        interval = check_interval(story.metadata, now)
+        with watchlist.lock:
+            entry.file = str(Path(story.filename).resolve())
+            entry.chapters = len(story.metadata.chapters)
+            entry.interval = interval
+            entry.next_check = now + interval
+            entry.last_checked = now
+            entry.dormant = bool(story.metadata.complete)
+    except (Exception, SystemExit) as e:  # pylint:disable=broad-except
+        click.echo(f"Checking {entry.url} failed: {e!r}", err=True)
+        with watchlist.lock:
+            entry.next_check = time.time() + MIN_INTERVAL
+
+
+def watch(watchlist: Watchlist, jobs: int = 4, verbose: bool = False, once: bool = False, **options) -> None:
+    """Runs due checks through a pool of workers until interrupted.
+
+    With ``once``, only the checks due right now are run.
+    """
+    running: Dict[str, Future] = {}
+    first_round = True
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            watchlist.refresh()
+            for entry in watchlist.due(time.time()) if first_round or not once else []:
+                if entry.url not in running:
+                    running[entry.url] = pool.submit(check_story, watchlist, entry, verbose, **options)
+            first_round = False
+            if not running:
+                if once:
+                    return
+                next_due = watchlist.next_due()
+                timeout = POLL_INTERVAL if next_due is None else next_due - time.time()
+                time.sleep(min(max(timeout, 1), POLL_INTERVAL))
+                continue
+            done, _ = wait(running.values(), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for url in [url for url, future in running.items() if future in done]:
+                del running[url]
+            if done:
+                watchlist.save()
+            if once and not running:
+                return
@@ -1,6 +1,29 @@
-from .aff import AdultFanFictionStory  # noqa: F401
-from .ffnet import FanFictionNetStory  # noqa: F401
-from .ao3 import ArchiveOfOurOwnStory  # noqa: F401
-from .tth import TwistingTheHellmouthStory  # noqa: F401
-from .html import HTMLStory  # noqa: F401
-from .tgstory import TGStorytimeStory  # noqa: F401
+from typing import Optional, Type
+
+from furl import furl  # type: ignore
+
+from .registry import SITES, SiteRegistry  # noqa: F401
+from .story import Story
+
+_ADAPTERS = {
+    "AdultFanFictionStory": ".aff",
+    "FanFictionNetStory": ".ffnet",
+    "ArchiveOfOurOwnStory": ".ao3",
+    "TwistingTheHellmouthStory": ".tth",
+    "HTMLStory": ".html",
+    "TGStorytimeStory": ".tgstory",
+}
+
+
+def __getattr__(name: str):
+    """Imports the adapters only when they're asked for."""
+    if name in _ADAPTERS:
+        from importlib import import_module
+
+        return getattr(import_module(_ADAPTERS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_site(url: furl) -> Optional[Type[Story]]:
+    """Returns the story class able to download from the URL's host."""
+    return SITES.get(url)
@@ -1,19 +1,28 @@
-import sys
 from datetime import date
 from re import sub
+from typing import ClassVar, Optional
+from urllib.parse import urlsplit
 
 import attr
 import pendulum  # type: ignore
 from bs4 import BeautifulSoup  # type: ignore
 from bs4.element import Tag  # type: ignore
 from furl import furl  # type: ignore
-from requests import Response, get
+from requests import Response
 
 from pyffdl.sites.story import Story
 
 
 @attr.s(auto_attribs=True)
 class AdultFanFictionStory(Story):
+    STORY_ID: ClassVar[str] = r"[?&]no=(\d+)"
+
+    @classmethod
+    def story_id(cls, url: str) -> Optional[str]:
+        # Every subdomain is a separate archive with its own story numbers.
+        story = super().story_id(url)
+        return f"{urlsplit(url).hostname}/{story}" if story else None
+
     @staticmethod
     def get_raw_text(response: Response) -> str:
         """Returns only the text of the chapter."""
@@ -54,20 +63,6 @@ class AdultFanFictionStory(Story):
                 timestr = timestr.replace("pm", "PM")
                 return pendulum.from_format(timestr, "MMMM D, YYYY H:mm A", "local")
 
-        def get_data(url: str, title: str, page: int = 1) -> list:
-            while True:
-                if page > 20:
-                    sys.exit(10)
-                _url = furl(url)
-                _url.args["page"] = page
-                r = get(_url.url)
-                q = BeautifulSoup(r.text, "html5lib")
-                data = q.find(string=title)
-                if not data:
-                    page += 1
-                else:
-                    return data.find_parent("tbody")("td")
-
         _header = self.page.select_one("table")("td")
         _author = _header[1].a
         _title = _header[0].string
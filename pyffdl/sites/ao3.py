@@ -1,5 +1,5 @@
 import re
-from typing import List, Optional, Tuple
+from typing import ClassVar, Dict, List, Optional, Tuple
 
 import attr
 import pendulum  # type: ignore
@@ -14,10 +14,16 @@ from pyffdl.utilities.misc import clean_text
 
 @attr.s(auto_attribs=True)
 class ArchiveOfOurOwnStory(Story):
-    def _init(self):
+    # Download the whole work in one request when at least this many chapters are missing
+    # and they make up most of the work; smaller updates go chapter by chapter.
+    FULL_WORK_THRESHOLD: ClassVar[int] = 2
+    HTTP2: ClassVar[bool] = True
+    STORY_ID: ClassVar[str] = r"^/works/(\d+)"
+
+    def _prepare(self):
         self.url.add({"view_adult": True})
-        main_page_request = self.session.get(self.url.url)
-        self.page = BeautifulSoup(main_page_request.content, "html5lib")
+
+    def _init(self):
         self.url.path.segments = [x for x in self.url.path.segments if x != ""]
         if "chapters" not in self.url.path.segments:
             self.url.path.segments += ["chapters", "1"]
@@ -25,9 +31,8 @@ class ArchiveOfOurOwnStory(Story):
             self.url.path.segments += ["1"]
 
     @staticmethod
-    def get_raw_text(response: Response) -> str:
-        """Returns only the text of the chapter."""
-        soup = BeautifulSoup(response.content, "html5lib")
+    def clean_chapter(soup: Tag) -> str:
+        """Returns the cleaned text of the first chapter in the page or its part."""
         return clean_text(
             tag
             for tag in soup.select_one("div.userstuff").select("p, h1, h2, h3, h4, h5, h6, hr")
@@ -38,6 +43,28 @@ class ArchiveOfOurOwnStory(Story):
             )
         )
 
+    @staticmethod
+    def get_raw_text(response: Response) -> str:
+        """Returns only the text of the chapter."""
+        return ArchiveOfOurOwnStory.clean_chapter(BeautifulSoup(response.content, "html5lib"))
+
+    def prefetch_chapters(self, numbers: List[int]) -> Dict[int, str]:
+        """Downloads the whole work at once and splits it into chapters."""
+        total = len(self.metadata.chapters)
+        if len(numbers) < max(self.FULL_WORK_THRESHOLD, total / 2 + 1):
+            return super().prefetch_chapters(numbers)
+        url = self.url.copy()
+        url.path.segments = url.path.segments[:2]
+        url.args["view_full_work"] = "true"
+        response = self.request(url.url)
+        if not response.ok:
+            return super().prefetch_chapters(numbers)
+        chapters = BeautifulSoup(response.content, "html5lib").select("div#chapters > div.chapter")
+        if len(chapters) != total:
+            return super().prefetch_chapters(numbers)
+        self.log(f"Downloaded all {total} chapters at once")
+        return {number: self.clean_chapter(chapters[number - 1]) for number in numbers}
+
     @staticmethod
     def chapter_parser(value: Tag) -> Tuple[int, str]:
         return int(value["value"]), re.sub(r"^\d+\.\s+", "", value.text)
@@ -46,6 +73,25 @@ class ArchiveOfOurOwnStory(Story):
     def select(self) -> str:
         return "select#selected_id option"
 
+    @classmethod
+    def author_works_url(cls, url: furl) -> Optional[furl]:
+        segments = [x for x in url.path.segments if x]
+        if segments[:1] != ["users"] or len(segments) < 2:
+            return None
+        works = url.copy().remove(args=True)
+        works.path.segments = segments[:4 if segments[2:3] == ["pseuds"] else 2] + ["works"]
+        return works
+
+    @classmethod
+    def list_works(cls, page: BeautifulSoup, url: furl) -> Tuple[List[furl], Optional[furl]]:
+        works = [
+            url.copy().remove(args=True).join(link["href"])
+            for link in (x.select_one("h4.heading a[href^='/works/']") for x in page.select("li.work.blurb"))
+            if link
+        ]
+        next_page = page.select_one("ol.pagination li.next a[href]")
+        return works, url.copy().join(next_page["href"]) if next_page else None
+
     def make_title_page(self) -> None:
         """Parses the main page for information about the story and author."""  # noqa: D202
 
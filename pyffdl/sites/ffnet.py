@@ -1,5 +1,5 @@
 import re
-from typing import Dict, List, Union, Tuple, Optional
+from typing import ClassVar, Dict, List, Union, Tuple, Optional
 
 import attr
 import pycountry
@@ -114,6 +114,8 @@ def turn_into_dictionary(input_data: List[str]) -> Dict[str, Union[str, int, Gen
 
 @attr.s(auto_attribs=True)
 class FanFictionNetStory(Story):
+    STORY_ID: ClassVar[str] = r"^/s/(\d+)"
+
     @staticmethod
     def get_raw_text(response: Response) -> str:
         """Returns only the text of the chapter."""
@@ -124,6 +126,14 @@ class FanFictionNetStory(Story):
     def select(self) -> str:
         return "span select#chap_select option"
 
+    @classmethod
+    def author_works_url(cls, url: furl) -> Optional[furl]:
+        return url.copy() if url.path.segments[:1] == ["u"] else None
+
+    @classmethod
+    def list_works(cls, page: BeautifulSoup, url: furl) -> Tuple[List[furl], Optional[furl]]:
+        return [url.copy().remove(args=True).join(x["href"]) for x in page.select("div.mystories a.stitle")], None
+
     @staticmethod
     def chapter_parser(value: Tag) -> str:
         return re.sub(r"\d+\.\s+", "", value.text)
@@ -1,5 +1,5 @@
 import re
-from typing import List, Tuple, Optional
+from typing import ClassVar, List, Tuple, Optional
 
 import attr
 from bs4 import BeautifulSoup  # type: ignore
@@ -12,6 +12,15 @@ from pyffdl.utilities.misc import clean_text
 
 @attr.s(auto_attribs=True)
 class HTMLStory(Story):
+    """A story collated from a list of chapter pages, with no main page to fetch."""
+
+    MAIN_PAGE: ClassVar[bool] = False
+    PREFETCH_JOBS: ClassVar[int] = 8
+
+    @classmethod
+    def from_chapters(cls, chapters: List[str], author: str, title: str, **options) -> "HTMLStory":
+        return cls(furl(chapters[0]), chapters=chapters, author=author, title=title, **options)
+
     @staticmethod
     def get_raw_text(response: Response) -> str:
         """Returns only the text of the chapter."""
@@ -0,0 +1,90 @@
+"""Maps hosts to the story classes that download from them.
+
+Adapters are imported only when a URL of their host is processed. Other packages can
+add adapters through the ``pyffdl.sites`` entry point group, naming each entry point
+after the host it handles::
+
+    [project.entry-points."pyffdl.sites"]
+    "example.com" = "mypackage.example:ExampleStory"
+"""
+import re
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Pattern, Type
+
+import attr
+from furl import furl  # type: ignore
+
+ENTRY_POINT_GROUP = "pyffdl.sites"
+
+BUILTIN_SITES = {
+    "fanfiction.net": "pyffdl.sites.ffnet:FanFictionNetStory",
+    "fictionpress.com": "pyffdl.sites.ffnet:FanFictionNetStory",
+    "adult-fanfiction.org": "pyffdl.sites.aff:AdultFanFictionStory",
+    "archiveofourown.org": "pyffdl.sites.ao3:ArchiveOfOurOwnStory",
+    "tthfanfic.org": "pyffdl.sites.tth:TwistingTheHellmouthStory",
+    "tgstorytime.com": "pyffdl.sites.tgstory:TGStorytimeStory",
+}
+
+
+def load_adapter(target: str) -> Type:
+    module, _, name = target.partition(":")
+    return getattr(import_module(module), name)
+
+
+@attr.s
+class SiteRegistry:
+    sites: Dict[str, str] = attr.ib(factory=dict)
+    plugins: bool = attr.ib(default=True)
+    _pattern: Optional[Pattern] = attr.ib(default=None, init=False, repr=False)
+    _loaded: Dict[str, Type] = attr.ib(factory=dict, init=False, repr=False)
+    _plugins_loaded: bool = attr.ib(default=False, init=False, repr=False)
+
+    def register(self, host: str, target: str) -> None:
+        """Registers ``module:Class`` as the adapter for the host and all its subdomains."""
+        self.sites[host.lower()] = target
+        self._pattern = None
+
+    @property
+    def pattern(self) -> Pattern:
+        if self._pattern is None:
+            hosts = sorted(self.sites, key=len, reverse=True)
+            self._pattern = re.compile(rf"(?:^|\.)({'|'.join(re.escape(x) for x in hosts)})\.?$")
+        return self._pattern
+
+    def load_plugins(self) -> None:
+        if self._plugins_loaded or not self.plugins:
+            return
+        self._plugins_loaded = True
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            self.register(entry_point.name, entry_point.value)
+
+    def match(self, host: str) -> Optional[str]:
+        """Returns the registered host that the given host belongs to."""
+        if not host:
+            return None
+        found = self.pattern.search(host.lower())
+        if not found and not self._plugins_loaded and self.plugins:
+            self.load_plugins()
+            found = self.pattern.search(host.lower())
+        return found.group(1) if found else None
+
+    def get(self, url: furl) -> Optional[Type]:
+        """Returns the story class for the URL, importing it on first use."""
+        return self.for_host(url.host)
+
+    def for_host(self, host: str) -> Optional[Type]:
+        host = self.match(host)
+        if not host:
+            return None
+        target = self.sites[host]
+        if target not in self._loaded:
+            self._loaded[target] = load_adapter(target)
+        return self._loaded[target]
+
+    def hosts(self) -> List[str]:
+        self.load_plugins()
+        return list(self.sites)
+
+
+SITES = SiteRegistry(dict(BUILTIN_SITES))
@@ -1,8 +1,15 @@
+import glob
+import os
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from html import escape
 from io import BytesIO
 from pathlib import Path
-from typing import Any, ClassVar, Iterator, List, Optional, Tuple, Union
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 from uuid import uuid4
 
 import attr
@@ -20,15 +27,21 @@ from ebooklib.epub import (
     EpubItem,
     EpubNav,
     EpubNcx,
-    write_epub,
 )
 from furl import furl
 from jinja2 import Environment, select_autoescape
 from pendulum import DateTime
 from requests import Response, Session
 
+from pyffdl.utilities.chapters import ChapterIndex, ChapterRecord, content_hash
+from pyffdl.utilities.cookies import cookie_store
 from pyffdl.utilities.covers import Cover
-from pyffdl.utilities.misc import ensure_data, strlen
+from pyffdl.utilities.events import event
+from pyffdl.utilities.files import atomic_file
+from pyffdl.utilities.images import ImageEmbedder, ImageOptions
+from pyffdl.utilities.misc import ensure_data, minify, strlen
+from pyffdl.utilities.transport import SessionTransport, Transport, http2_transport
+from pyffdl.utilities.writer import Compression, write_epub, write_epub_fast
 
 
 def prepare_style(file: Path) -> EpubItem:
@@ -41,6 +54,12 @@ def prepare_style(file: Path) -> EpubItem:
         )
 
 
+@lru_cache()
+def load_styles(data: Path) -> Tuple[EpubItem, ...]:
+    """Loads the stylesheets once per process, they are shared by all stories."""
+    return tuple(prepare_style(file) for file in (data / "styles").glob("*.css"))
+
+
 @attr.s
 class Author:
     name: str = attr.ib(factory=str)
@@ -93,19 +112,19 @@ class Metadata:
     url: furl = attr.ib(factory=furl, converter=furl)
 
     title: str = attr.ib(default="")
-    author: Author = attr.ib(default=Author("", furl("")))
+    author: Author = attr.ib(factory=lambda: Author("", furl("")))
     complete: bool = attr.ib(default=False)
     published: MyDateTime = attr.ib(default=pendulum.local(1970, 1, 1))
     updated: MyDateTime = attr.ib(default=pendulum.local(1970, 1, 1))
-    downloaded: MyDateTime = attr.ib(default=pendulum.now())
+    downloaded: MyDateTime = attr.ib(factory=pendulum.now)
     language: str = attr.ib(default="English")
     category: str = attr.ib(default="")
-    genres: Listing = attr.ib(default=Listing(sep="/"))
-    characters: Characters = attr.ib(default=Characters())
+    genres: Listing = attr.ib(factory=lambda: Listing(sep="/"))
+    characters: Characters = attr.ib(factory=Characters)
     words: int = attr.ib(default=0)
     summary: str = attr.ib(default="")
     rating: str = attr.ib(default="")
-    tags: Listing = attr.ib(default=Listing(sep=", "))
+    tags: Listing = attr.ib(factory=lambda: Listing(sep=", "))
     chapters: List[str] = attr.ib(default=attr.Factory(list))
     extras: List[Extra] = attr.ib(default=attr.Factory(list))
 
@@ -118,6 +137,34 @@ class Metadata:
         number_of_chapters = len(self.chapters) if self.complete else "??"
         return f"{len(self.chapters)}/{number_of_chapters}"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the metadata as plain values that can be serialised to JSON."""
+        def date(value: Optional[DateTime]) -> Optional[str]:
+            return value.isoformat() if value else None
+
+        return {
+            "url": self.url.tostr(),
+            "title": self.title,
+            "author": {"name": self.author.name, "url": str(self.author.url) if self.author.url else None},
+            "complete": self.complete,
+            "published": date(self.published),
+            "updated": date(self.updated),
+            "downloaded": date(self.downloaded),
+            "language": self.language,
+            "category": self.category,
+            "rating": self.rating,
+            "genres": list(self.genres.items),
+            "characters": {
+                "singles": list(self.characters.singles),
+                "couples": [list(x) for x in self.characters.couples],
+            },
+            "tags": list(self.tags.items),
+            "words": self.words,
+            "summary": self.summary,
+            "chapters": [x[-1] if isinstance(x, tuple) else x for x in self.chapters],
+            "extras": [{"name": x.name, "value": x.value} for x in self.extras],
+        }
+
 
 @attr.s
 class Datum:
@@ -172,7 +219,7 @@ class FrontPage:
     """
 
     @classmethod
-    def from_metadata(cls, metadata: Metadata):
+    def from_metadata(cls, metadata: Metadata, volume: Optional[Dict[str, Any]] = None, chapters: int = 0):
         story_data = [
             Datum(name="Story", value=metadata.title),
             Datum(name="Author", value=metadata.author.name),
@@ -194,6 +241,12 @@ class FrontPage:
         for extra in metadata.extras:
             story_data.append(Datum(name=extra.name, value=extra.value))
 
+        if volume:
+            last = volume["first"] + chapters - 1
+            story_data.append(
+                Datum(name="Volume", value=f"{volume['number']} (chapters {volume['first']}-{last})")
+            )
+
         return cls(metadata.title, metadata.author.name, story_data, metadata.summary)
 
     @property
@@ -206,6 +259,32 @@ class FrontPage:
         )
 
 
+VOLUME_FILE = re.compile(r"^(?P<base>.*) - Vol (?P<number>\d+)$")
+
+
+def volume_base(filename: Union[str, Path]) -> Path:
+    """Returns the name of the whole book that a volume belongs to."""
+    path = Path(filename)
+    match = VOLUME_FILE.match(path.stem)
+    return path.with_name(match.group("base") + path.suffix) if match else path
+
+
+def volume_filename(filename: Union[str, Path], number: int) -> Path:
+    base = volume_base(filename)
+    return base.with_name(f"{base.stem} - Vol {number:02}{base.suffix}")
+
+
+def last_volume(filename: Union[str, Path]) -> Optional[Path]:
+    """Returns the last volume of the book, if it's split into volumes."""
+    base = volume_base(filename)
+    volumes = {
+        int(match.group("number")): path
+        for path in base.parent.glob(f"{glob.escape(base.stem)} - Vol *{base.suffix}")
+        if (match := VOLUME_FILE.match(path.stem)) and volume_base(path) == base
+    }
+    return volumes[max(volumes)] if volumes else None
+
+
 class SelfSession(cloudscraper.CloudScraper):
 
     @classmethod
@@ -215,6 +294,9 @@ class SelfSession(cloudscraper.CloudScraper):
         return session
 
 
+DEFAULT_SESSION = SelfSession()
+
+
 @attr.s()
 class Story:
     url: furl = attr.ib(
@@ -224,39 +306,130 @@ class Story:
     cover: bytes = attr.ib(default=b"")
     verbose: bool = attr.ib(default=True)
     force: bool = attr.ib(default=False)
-    session: SelfSession = attr.ib(default=SelfSession())
+    revalidate: bool = attr.ib(default=False)
+    fast_write: bool = attr.ib(default=False)
+    minify: bool = attr.ib(default=False)
+    compression: str = attr.ib(default="default")
+    http2: bool = attr.ib(default=False)
+    images: Optional[ImageOptions] = attr.ib(default=None)
+    max_chapters_per_volume: Optional[int] = attr.ib(default=None)
+    max_volume_mb: Optional[float] = attr.ib(default=None)
+    session: SelfSession = attr.ib(default=DEFAULT_SESSION)
+    transport: Optional[Transport] = attr.ib(default=None)
     filename: str = attr.ib(default="")
+    output_dir: str = attr.ib(default="")
     metadata: Metadata = attr.ib(default=Metadata.empty())
     book: EpubBook = attr.ib(default=EpubBook())
     styles: List[EpubItem] = attr.ib(default=[])
     page: BeautifulSoup = attr.ib(default=BeautifulSoup("", "lxml"))
     data: Path = attr.ib(default=Path())
+    chapter_index: ChapterIndex = attr.ib(factory=ChapterIndex)
+    prefetched: Dict[int, str] = attr.ib(factory=dict)
+    responses: Dict[int, Any] = attr.ib(factory=dict)
+    prepared: bool = attr.ib(default=False, init=False)
+    listed: bool = attr.ib(default=False, init=False)
+    main_page: Optional[bytes] = attr.ib(default=None, repr=False)
+    text_sizes: List[int] = attr.ib(init=False, factory=lambda: [0, 0])
 
     chapters: List[str] = attr.ib(default=attr.Factory(list))
     author: str = attr.ib(default="")
     title: str = attr.ib(default="")
 
     ILLEGAL_CHARACTERS: ClassVar = r'[<>:"/\|?]'
+    # Whether the site can be fetched over HTTP/2, i.e. isn't behind Cloudflare.
+    HTTP2: ClassVar[bool] = False
+    # Whether the story has a main page to fetch and parse.
+    MAIN_PAGE: ClassVar[bool] = True
+    # How many chapters to fetch at once over a transport that can't multiplex them.
+    PREFETCH_JOBS: ClassVar[int] = 0
+    # Pattern finding the story ID in the path and query of any of the story's URLs.
+    STORY_ID: ClassVar[Optional[str]] = None
 
     def __attrs_post_init__(self):
 
         self.metadata = Metadata(self.url)
         self.data = ensure_data()
-        self.styles = [
-            prepare_style(file) for file in (self.data / "styles").glob("*.css")
-        ]
+        self.styles = list(load_styles(self.data))
+        if self.transport is None:
+            self.transport = (
+                http2_transport() if self.http2 and self.HTTP2 else SessionTransport(self.session, cookie_store())
+            )
 
-        main_page_request = self.session.get(self.url.url)
-        if not main_page_request.ok:
-            click.echo(f"I couldn't establish connection to {self.url}.\n{main_page_request.status_code}")
-            sys.exit(1)
-        self.page = BeautifulSoup(main_page_request.content, "html5lib")
+        self._prepare()
+        if self.MAIN_PAGE:
+            self.page = self.fetch_main_page()
 
         self._init()
 
+    def fetch_main_page(self) -> BeautifulSoup:
+        """Parses the main page, fetching it unless its content was given as ``main_page``."""
+        if self.main_page is None:
+            main_page_request = self.request(self.url.url)
+            if not main_page_request.ok:
+                click.echo(
+                    f"I couldn't establish connection to {self.url}.\n{main_page_request.status_code}", err=True
+                )
+                sys.exit(1)
+            self.main_page = main_page_request.content
+        return BeautifulSoup(self.main_page, "html5lib")
+
+    def request(self, url: str, headers: Optional[Dict[str, str]] = None, **fields) -> Any:
+        """Fetches a page through the transport and records the request in the event log."""
+        started = time.monotonic()
+        response = self.transport.get(url, headers=headers)
+        event(
+            "request",
+            url=url,
+            story=self.url.tostr(),
+            status=response.status_code,
+            bytes=len(response.content),
+            latency=round(time.monotonic() - started, 3),
+            **fields,
+        )
+        return response
+
+    def request_many(self, urls: Dict[Any, str]) -> Dict[Any, Any]:
+        """Fetches several pages at once, returning the responses under the same keys as the URLs."""
+        started = time.monotonic()
+        responses = dict(zip(urls, self.transport.get_many(list(urls.values()))))
+        latency = round(time.monotonic() - started, 3)
+        for key, response in responses.items():
+            event(
+                "request",
+                url=urls[key],
+                story=self.url.tostr(),
+                status=response.status_code,
+                bytes=len(response.content),
+                latency=latency,
+                batch=len(urls),
+            )
+        return responses
+
+    @classmethod
+    def parse(cls, url, verbose, force, **options):
+        return cls(url, verbose=verbose, force=force, **options)
+
+    @classmethod
+    def story_id(cls, url: str) -> Optional[str]:
+        """Returns the ID the site knows the story by, the same for all of its URLs."""
+        if not cls.STORY_ID:
+            return None
+        parts = urlsplit(url)
+        found = re.search(cls.STORY_ID, f"{parts.path}?{parts.query}")
+        return found.group(1) if found else None
+
+    @classmethod
+    def author_works_url(cls, url: furl) -> Optional[furl]:
+        """Returns the URL of the author's list of works, if the site has one."""
+        return None
+
     @classmethod
-    def parse(cls, url, verbose, force):
-        return cls(url, verbose=verbose, force=force)
+    def list_works(cls, page: BeautifulSoup, url: furl) -> Tuple[List[furl], Optional[furl]]:
+        """Returns the stories on a page of the author's works, and the URL of the next page."""
+        return [], None
+
+    def _prepare(self):
+        """Adjusts the URL before the main page is fetched, e.g. to skip consent pages."""
 
     def _init(self):
         pass
@@ -264,10 +437,29 @@ class Story:
     def run(self):
         self.log(f"Downloading {self.url}", force=True)
 
+        self.prepare()
+        self.get_filename()
+        self.list_chapters()
+        self.make_ebook()
+
+    def prepare(self) -> None:
+        """Reads the current ebook, parses the title page and renders the cover.
+
+        This is the first step of ``run``, but it can also be done ahead of it, e.g.
+        while the previous story of a batch is downloading.
+        """
+        if self.prepared:
+            return
+        if self.filename and not self.force:
+            self.filename = str(last_volume(self.filename) or self.filename)
         try:
             self.book = epub.read_epub(self.filename) if not self.force else None
         except (AttributeError, FileNotFoundError):
             pass
+        self.chapter_index = ChapterIndex.from_book(self.book)
+        volume = self.chapter_index.volume
+        self.max_chapters_per_volume = self.max_chapters_per_volume or volume.get("max_chapters")
+        self.max_volume_mb = self.max_volume_mb or volume.get("max_mb")
 
         self.make_title_page()
 
@@ -282,10 +474,7 @@ class Story:
                 cover.run()
                 cover.image.save(b, format="jpeg")
                 self.cover = b.getvalue()
-
-        self.get_filename()
-        self.get_chapters()
-        self.make_ebook()
+        self.prepared = True
 
     @property
     def select(self) -> str:
@@ -309,8 +498,7 @@ class Story:
         if force:
             if not self.verbose:
                 echo(text)
-            with open("pyffdl.log", "a") as fp:
-                echo(text, file=fp)
+            event("message", text, story=self.url.tostr())
 
     def get_chapters(self) -> None:
         """Gets the number of chapters and the base template for chapter URLs."""
@@ -321,13 +509,20 @@ class Story:
         else:
             self.metadata.chapters = [self.metadata.title]
 
+    def list_chapters(self) -> None:
+        """Gets the list of chapters, unless it was already got ahead of ``run``."""
+        if self.listed:
+            return
+        self.get_chapters()
+        self.listed = True
+
     def get_filename(self) -> None:
         clean_title = re.sub(rf"{self.ILLEGAL_CHARACTERS}", "_", self.metadata.title)
         pre = "[ADULT] " if self.is_adult else ""
         self.filename = (
             self.filename
             if self.filename
-            else f"{pre}{self.metadata.author.name} - {clean_title}.epub"
+            else str(Path(self.output_dir) / f"{pre}{self.metadata.author.name} - {clean_title}.epub")
         )
 
     def make_title_page(self) -> None:
@@ -340,42 +535,106 @@ class Story:
     def chapter_cleanup(chapters: List[Any]) -> List[str]:
         return chapters
 
-    def step_through_chapters(self, chapters: list) -> Iterator[EpubHtml]:
-        """Runs through the list of chapters and downloads each one."""  # noqa: D202
-
-        def get_text(chapter_title: str) -> str:
-            try:
-                url_segment, chapter_title = chapter_title
-            except (ValueError, TypeError):
-                url_segment = str(index)
-            # pylint:disable=assignment-from-no-return
-            url = self.make_new_chapter_url(self.url.copy(), str(url_segment))
-            if not url:
-                return ""
-            header = f"<h1>{chapter_title}</h1>"
-            raw_chapter = self.session.get(url.url)
-            full_text = header + self.get_raw_text(raw_chapter)
-            cn = style(chapter_number, bold=True, fg='blue')
-            ct = style(chapter_title, fg='yellow')
-            self.log(
-                f"Downloading chapter {cn} - {ct}"
-            )
-            return full_text
+    def get_chapter_url(self, index: int, chapter: Any) -> Tuple[Optional[furl], str]:
+        """Returns the URL and the title of a chapter from its entry in the chapter list."""
+        try:
+            url_segment, chapter_title = chapter
+        except (ValueError, TypeError):
+            url_segment, chapter_title = str(index), chapter
+        # pylint:disable=assignment-from-no-return
+        return self.make_new_chapter_url(self.url.copy(), str(url_segment)), chapter_title
+
+    def prefetch_chapters(self, numbers: List[int]) -> Dict[int, str]:
+        """Fetches several chapters at once, if the site can; returns an empty dict.
+
+        Over a multiplexed transport the chapter pages are all requested concurrently, over
+        any other one ``PREFETCH_JOBS`` at a time. The responses are kept in ``responses``
+        until ``fetch_chapter`` gets to them. Sites that can get the texts in some cheaper
+        way override this and return them by chapter number.
+        """
+        if not (self.transport.multiplexed or self.PREFETCH_JOBS) or len(numbers) < 2:
+            return {}
+        urls = {
+            number: url.url
+            for number in numbers
+            if (url := self.get_chapter_url(number, self.metadata.chapters[number - 1])[0])
+        }
+        if self.transport.multiplexed:
+            self.responses = self.request_many(urls)
+        else:
+            with ThreadPoolExecutor(max_workers=self.PREFETCH_JOBS) as pool:
+                futures = {number: pool.submit(self.request, url, chapter=number) for number, url in urls.items()}
+            self.responses = {number: future.result() for number, future in futures.items()}
+        return {}
 
+    @staticmethod
+    def chapter_header(title: str) -> str:
+        """Returns the chapter's heading; the title is plain text, so it gets escaped."""
+        return f"<h1>{escape(title)}</h1>"
+
+    def fetch_chapter(self, index: int, chapter: Any, record: Optional[ChapterRecord] = None) -> Optional[str]:
+        """Downloads a chapter and records its hash and validators.
+
+        With a ``record`` the request is conditional, and ``None`` is returned if the
+        chapter hasn't changed since it was recorded. The hash is of the text before it
+        gets minified, so minifying doesn't make chapters look changed. An empty record,
+        for a book made before chapters were recorded, has nothing to compare with, so
+        the stored chapter is kept and only its record is made.
+        """
+        url, chapter_title = self.get_chapter_url(index, chapter)
+        if index in self.prefetched and record is None:
+            full_text = self.chapter_header(chapter_title) + self.prefetched.pop(index)
+            self.chapter_index[index] = ChapterRecord(content_hash(full_text))
+            return self.minified(full_text)
+        if not url:
+            return "" if record is None else None
+        response = self.responses.pop(index, None) if record is None else None
+        if response is None:
+            headers = record.conditional_headers if record else None
+            response = self.request(url.url, headers, chapter=index)
+        if record and (response.status_code == 304 or not response.ok):
+            return None
+        full_text = self.chapter_header(chapter_title) + self.get_raw_text(response)
+        new_record = ChapterRecord.from_response(full_text, response)
+        self.chapter_index[index] = new_record
+        if record and (not record.hash or new_record.hash == record.hash):
+            return None
+        return self.minified(full_text)
+
+    def step_through_chapters(self, chapters: list, start: int = 1) -> Iterator[EpubHtml]:
+        """Runs through the list of chapters from ``start`` on and downloads each one.
+
+        ``chapters`` are the ones already in the ebook, starting with chapter ``start``.
+        """
         chap_padding = (
             strlen(self.metadata.chapters) if strlen(self.metadata.chapters) > 2 else 2
         )
 
         self.metadata.chapters = self.chapter_cleanup(self.metadata.chapters)
 
-        for _index, title in enumerate(self.metadata.chapters):
+        missing = list(range(start + len(chapters), len(self.metadata.chapters) + 1))
+        self.prefetched = self.prefetch_chapters(missing) if missing else {}
+
+        for _index, title in enumerate(self.metadata.chapters[start - 1:], start - 1):
             index = _index + 1
             chapter_number = str(index).zfill(chap_padding)
-            if index <= len(chapters):
-                html = chapters[_index]
-                text = str(BeautifulSoup(html.get_body_content(), "html5lib"))
+            cn = style(chapter_number, bold=True, fg="blue")
+            ct = style(self.get_chapter_url(index, title)[1], fg="yellow")
+            text = None
+            if index < start + len(chapters):
+                if self.revalidate:
+                    text = self.fetch_chapter(
+                        index, title, self.chapter_index.get(index) or ChapterRecord("")
+                    )
+                    if text is not None:
+                        self.log(f"Chapter {cn} - {ct} has changed, replacing")
+                if text is None:
+                    html = chapters[index - start]
+                    text = str(BeautifulSoup(html.get_body_content(), "html5lib"))
             else:
-                text = get_text(title)
+                text = self.fetch_chapter(index, title)
+                self.log(f"Downloading chapter {cn} - {ct}")
+                event("chapter", story=self.url.tostr(), chapter=index)
 
             if isinstance(title, tuple):
                 title = title[-1]
@@ -389,20 +648,50 @@ class Story:
                 chapter.add_item(s)
             yield chapter
 
-    def make_ebook(self) -> None:
-        """Combines everything to make an ePub book."""
-        book = EpubBook()
-        book.set_identifier(str(uuid4()))
-        book.set_title(self.metadata.title)
-        book.set_language(pycountry.languages.get(name=self.metadata.language).alpha_2)
-        book.add_author(self.metadata.author.name)
+    def minified(self, text: str) -> str:
+        """Minifies a chapter's text if asked to, keeping count of the bytes saved."""
+        if not self.minify:
+            return text
+        result = minify(text)
+        self.text_sizes[0] += len(text.encode("utf-8"))
+        self.text_sizes[1] += len(result.encode("utf-8"))
+        return result
+
+    def report_minified(self) -> None:
+        before, after = self.text_sizes
+        if not before:
+            return
+        saved = f"{before:,} to {after:,} bytes, {1 - after / before:.1%} smaller"
+        echo("Minified the chapters from " + style(saved, bold=True))
+        event("minify", story=self.url.tostr(), before=before, after=after)
 
-        nav = EpubNav()
-        ncx = EpubNcx()
+    @property
+    def splits_volumes(self) -> bool:
+        return bool(self.max_chapters_per_volume or self.max_volume_mb or self.chapter_index.volume)
+
+    def split_volumes(self, chapters: List[EpubHtml]) -> Iterator[List[EpubHtml]]:
+        """Fills volumes with the chapters in order, each up to the chapter and size limits."""
+        volume: List[EpubHtml] = []
+        size = 0
+        limit = self.max_volume_mb * 2 ** 20 if self.max_volume_mb else None
+        for chapter in chapters:
+            chapter_size = len(chapter.content.encode("utf-8"))
+            if volume and (
+                    len(volume) >= (self.max_chapters_per_volume or len(volume) + 1)
+                    or limit and size + chapter_size > limit
+            ):
+                yield volume
+                volume, size = [], 0
+            volume.append(chapter)
+            size += chapter_size
+        if volume:
+            yield volume
 
-        book.add_item(ncx)
-        book.add_item(nav)
+    def make_ebook(self) -> None:
+        """Combines everything to make an ePub book, or its volumes if the story gets split.
 
+        Only the last volume is ever reread; once a volume is full it isn't touched again.
+        """
         current_chapters = (
             [
                 x
@@ -413,11 +702,64 @@ class Story:
             else []
         )
 
-        book.toc = [x for x in self.step_through_chapters(current_chapters)]
+        volume = self.chapter_index.volume
+        first = volume.get("first", 1)
+        chapters = list(self.step_through_chapters(current_chapters, first))
+        self.report_minified()
+
+        if not self.splits_volumes:
+            self.write(self.assemble(chapters, self.book))
+            return
+
+        number = volume.get("number", 1)
+        unsplit = Path(self.filename) if not volume else None
+        for offset, part in enumerate(self.split_volumes(chapters)):
+            info = {
+                "number": number + offset,
+                "first": first,
+                "max_chapters": self.max_chapters_per_volume,
+                "max_mb": self.max_volume_mb,
+            }
+            self.filename = str(volume_filename(self.filename, info["number"]))
+            self.write(self.assemble(part, self.book if not offset else None, info))
+            first += len(part)
+        # The volumes of a book that is split for the first time replace the whole book.
+        if unsplit and unsplit.exists() and not VOLUME_FILE.match(unsplit.stem):
+            unsplit.unlink()
+            self.log(f"Split {unsplit} into volumes, removed it", force=True)
+
+    def assemble(
+            self, chapters: List[EpubHtml], previous: Optional[EpubBook], volume: Optional[Dict[str, Any]] = None
+    ) -> EpubBook:
+        """Makes the book, or one volume of it, from the chapters.
+
+        Images embedded in the ``previous`` version of the book are carried over.
+        """
+        book = EpubBook()
+        book.set_identifier(str(uuid4()))
+        book.set_title(
+            f"{self.metadata.title}, Volume {volume['number']}" if volume else self.metadata.title
+        )
+        book.set_language(pycountry.languages.get(name=self.metadata.language).alpha_2)
+        book.add_author(self.metadata.author.name)
+
+        nav = EpubNav()
+        ncx = EpubNcx()
+
+        book.add_item(ncx)
+        book.add_item(nav)
+
+        book.toc = chapters
+
+        embedder = ImageEmbedder(self.request, self.images or ImageOptions())
+        embedder.keep(previous)
+        for image in embedder.embed(book.toc) if self.images else embedder.items.values():
+            book.add_item(image)
 
         book.set_cover("cover.jpg", self.cover)
 
-        template = FrontPage.from_metadata(self.metadata)
+        numbers = range(volume["first"], volume["first"] + len(chapters)) if volume else None
+        template = FrontPage.from_metadata(self.metadata, volume, len(chapters))
 
         title_page = EpubHtml(
             title=self.metadata.title,
@@ -439,9 +781,23 @@ class Story:
 
         book.spine.append(nav)
 
-        self.write(book)
+        book.add_item(self.chapter_index.to_item(numbers, volume))
+
+        return book
 
     def write(self, book) -> None:
-        """Create the epub file."""
+        """Create the epub file, replacing the old one only once the new one is complete."""
         echo("Writing into " + style(self.filename, bold=True, fg="green"))
-        write_epub(self.filename, book, {"tidyhtml": True, "epub3_pages": False})
+        compression = Compression.named(self.compression)
+        with atomic_file(self.filename) as temporary:
+            if self.fast_write:
+                write_epub_fast(temporary, book, compression)
+            else:
+                write_epub(temporary, book, {"tidyhtml": True, "epub3_pages": False}, compression)
+        event(
+            "story",
+            story=self.url.tostr(),
+            file=self.filename,
+            chapters=len(self.metadata.chapters),
+            bytes=os.path.getsize(self.filename),
+        )
@@ -1,6 +1,5 @@
 import re
-from typing import Any, Dict, Tuple, Union
-from sys import exit as sysexit
+from typing import Any, ClassVar, Dict, Tuple, Union
 
 import attr
 import pendulum  # type: ignore
@@ -15,13 +14,10 @@ from pyffdl.utilities.misc import clean_text
 
 @attr.s(auto_attribs=True)
 class TGStorytimeStory(Story):
-    def _init(self):
-        if self.page.select_one(".bigblock .errormsg"):
-            self.url.query.add({"ageconsent": "ok"})
-            main_page_request = self.session.get(self.url.url)
-            if not main_page_request.ok:
-                sysexit(1)
-            self._page = BeautifulSoup(main_page_request.content, "html5lib")
+    STORY_ID: ClassVar[str] = r"[?&]sid=(\d+)"
+
+    def _prepare(self):
+        self.url.args["ageconsent"] = "ok"
 
     @staticmethod
     def get_raw_text(response: Response) -> str:
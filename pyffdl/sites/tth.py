@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import ClassVar, List, Optional, Tuple
 
 import attr
 import pycountry
@@ -42,6 +42,8 @@ class Header:
 
 @attr.s(auto_attribs=True)
 class TwistingTheHellmouthStory(Story):
+    STORY_ID: ClassVar[str] = r"^/Story-(\d+)"
+
     @staticmethod
     def get_raw_text(response: Response) -> str:
         """Returns only the text of the chapter."""
@@ -59,6 +61,18 @@ class TwistingTheHellmouthStory(Story):
     def select(self) -> str:
         return "select#chapnav option"
 
+    @classmethod
+    def author_works_url(cls, url: furl) -> Optional[furl]:
+        return url.copy() if url.path.segments[:1] and url.path.segments[0].startswith("AuthorStories-") else None
+
+    @classmethod
+    def list_works(cls, page: BeautifulSoup, url: furl) -> Tuple[List[furl], Optional[furl]]:
+        works = {}
+        for link in page.select("a[href^='/Story-']"):
+            story = re.match(r"/Story-(?P<story>\d+)", link["href"])
+            works.setdefault(story.group("story"), url.copy().remove(args=True).join(link["href"]))
+        return list(works.values()), None
+
     def make_title_page(self) -> None:
         """Parses the main page for information about the story and author."""
         _header = self.page.find("div", class_="storysummary formbody defaultcolors")
@@ -0,0 +1,87 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional
+
+import attr
+from ebooklib.epub import EpubBook, EpubItem  # type: ignore
+from requests import Response
+
+INDEX_ID = "pyffdl-index"
+INDEX_FILE = "pyffdl.json"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@attr.s(auto_attribs=True)
+class ChapterRecord:
+    hash: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, text: str, response: Response) -> "ChapterRecord":
+        return cls(
+            content_hash(text),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    @property
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that let the server answer 304 if the chapter is unchanged."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@attr.s
+class ChapterIndex:
+    """Content hashes and validators of the chapters stored in a book, keyed by chapter number.
+
+    For a story split into volumes, ``volume`` says which one the book is.
+    """
+
+    records: Dict[int, ChapterRecord] = attr.ib(factory=dict)
+    volume: Dict[str, Any] = attr.ib(factory=dict)
+
+    def get(self, number: int) -> Optional[ChapterRecord]:
+        return self.records.get(number)
+
+    def __setitem__(self, number: int, record: ChapterRecord) -> None:
+        self.records[number] = record
+
+    @classmethod
+    def from_book(cls, book: Optional[EpubBook]) -> "ChapterIndex":
+        item = book.get_item_with_id(INDEX_ID) if book else None
+        if not item:
+            return cls()
+        try:
+            data = json.loads(item.content)
+        except ValueError:
+            return cls()
+        return cls(
+            {int(number): ChapterRecord(**record) for number, record in data.get("chapters", {}).items()},
+            data.get("volume", {}),
+        )
+
+    def to_item(self, numbers: Optional[Iterable[int]] = None, volume: Optional[Dict[str, Any]] = None) -> EpubItem:
+        """Stores the records of the chapters with the given ``numbers``, or all of them, in the book."""
+        numbers = set(numbers) if numbers is not None else set(self.records)
+        data: Dict[str, Any] = {
+            "chapters": {
+                str(number): attr.asdict(record) for number, record in sorted(self.records.items()) if number in numbers
+            }
+        }
+        if volume:
+            data["volume"] = volume
+        return EpubItem(
+            uid=INDEX_ID,
+            file_name=INDEX_FILE,
+            media_type="application/json",
+            content=json.dumps(data, indent=1).encode("utf-8"),
+        )
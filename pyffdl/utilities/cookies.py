@@ -0,0 +1,140 @@
+"""Cookies, Cloudflare clearance included, kept on disk and shared by all runs and workers.
+
+Clearance cookies are only valid with the user agent that earned them, so the store
+keeps that too, and every session loading the cookies takes it over. The file is
+locked while it's read or merged, so concurrent processes don't lose each other's
+cookies; where ``fcntl`` isn't available, only the atomic replacement protects it.
+"""
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, Tuple
+
+import attr
+import click
+
+from pyffdl.utilities.misc import APP
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# How long cookies that expire with the browser session are kept.
+SESSION_COOKIE_AGE = 24 * 60 * 60
+
+Snapshot = FrozenSet[Tuple[str, str, str, str]]
+
+
+def default_cookie_file() -> Path:
+    return Path(click.get_app_dir(APP)) / "cookies.json"
+
+
+@contextmanager
+def locked(path: Path, exclusive: bool = False) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as fp:
+        if fcntl:
+            fcntl.flock(fp, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def snapshot(session: Any) -> Snapshot:
+    return frozenset((x.domain, x.path, x.name, x.value or "") for x in session.cookies)
+
+
+@attr.s
+class CookieStore:
+    path: Path = attr.ib(converter=Path)
+    _saved: weakref.WeakKeyDictionary = attr.ib(init=False, factory=weakref.WeakKeyDictionary, repr=False)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def read(self) -> Dict[str, Any]:
+        try:
+            with self.path.open() as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return {"user_agent": None, "cookies": {}}
+        now = time.time()
+        data["cookies"] = {
+            domain: [x for x in cookies if x["expires"] > now] for domain, cookies in data.get("cookies", {}).items()
+        }
+        return data
+
+    def write(self, data: Dict[str, Any]) -> None:
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with temporary.open("w") as fp:
+            json.dump(data, fp, indent=1)
+        os.replace(temporary, self.path)
+
+    def load(self, session: Any) -> None:
+        """Gives a new session the stored cookies and user agent; sessions already loaded are skipped."""
+        with self._lock:
+            if session in self._saved:
+                return
+            try:
+                with locked(self.path):
+                    data = self.read()
+            except OSError:
+                data = {"cookies": {}}
+            if data.get("user_agent"):
+                session.headers["User-Agent"] = data["user_agent"]
+            for domain, cookies in data["cookies"].items():
+                for cookie in cookies:
+                    session.cookies.set(
+                        cookie["name"],
+                        cookie["value"],
+                        domain=domain,
+                        path=cookie["path"],
+                        expires=int(cookie["expires"]),
+                        secure=cookie["secure"],
+                    )
+            self._saved[session] = snapshot(session)
+
+    def save(self, session: Any) -> None:
+        """Merges the session's cookies into the file, if they changed since they were last saved."""
+        current = snapshot(session)
+        with self._lock:
+            if self._saved.get(session) == current:
+                return
+            now = time.time()
+            try:
+                with locked(self.path, exclusive=True):
+                    data = self.read()
+                    data["user_agent"] = data.get("user_agent") or session.headers.get("User-Agent")
+                    for cookie in session.cookies:
+                        stored = [
+                            x for x in data["cookies"].get(cookie.domain, [])
+                            if (x["path"], x["name"]) != (cookie.path, cookie.name)
+                        ]
+                        expires = cookie.expires or now + SESSION_COOKIE_AGE
+                        if expires > now:
+                            stored.append(
+                                {
+                                    "name": cookie.name,
+                                    "value": cookie.value,
+                                    "path": cookie.path,
+                                    "expires": expires,
+                                    "secure": bool(cookie.secure),
+                                }
+                            )
+                        data["cookies"][cookie.domain] = stored
+                    self.write(data)
+            except OSError:
+                return
+            self._saved[session] = current
+
+
+@lru_cache()
+def cookie_store() -> CookieStore:
+    """Returns the cookie store shared by all sessions of this process."""
+    return CookieStore(default_cookie_file())
@@ -1,12 +1,25 @@
 import hashlib
 import random
 import re
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+from typing import Tuple
 
 import attr
 from PIL import Image, ImageDraw, ImageEnhance, ImageFont  # type: ignore
 
 
+@lru_cache()
+def read_font(font_file: Path) -> bytes:
+    return font_file.read_bytes()
+
+
+@lru_cache()
+def list_covers(directory: Path) -> Tuple[Path, ...]:
+    return tuple((directory / "covers").glob("*.jpg"))
+
+
 @attr.s(auto_attribs=True)
 class Title:
     text: str
@@ -28,7 +41,7 @@ class Cover:
 
     def __attrs_post_init__(self):  # noqa: D105
         self._image = Image.open(self.image_file)
-        self._font = ImageFont.truetype(str(self.font_file), 40)
+        self._font = ImageFont.truetype(BytesIO(read_font(self.font_file)), 40)
         self._title = Title.from_text(self.text, self._font)
         self._width, self._height = self._image.size
 
@@ -42,7 +55,7 @@ class Cover:
         cls, title: str, author: str, directory: Path, font: str = "Junction-bold.otf"
     ):
         def choose_cover(name: str) -> Path:
-            covers = [x for x in (directory / "covers").glob("*.jpg")]
+            covers = list_covers(directory)
             title_hash = hashlib.md5(name.encode()).hexdigest()
             cover_idx = int(title_hash, base=16) % len(covers)
             return covers[cover_idx]
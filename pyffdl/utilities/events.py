@@ -0,0 +1,122 @@
+"""Structured event log, written as JSON lines by a background thread.
+
+Events are handed to a queue by the threads that download the stories, and a single
+listener appends them to the log file, which stays open for the whole run.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO, Union
+
+import pendulum
+
+DEFAULT_LOG = "pyffdl.log"
+PROGRESS_INTERVAL = 2.0
+
+logger = logging.getLogger("pyffdl.events")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+_path: Union[str, Path] = DEFAULT_LOG
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "time": pendulum.from_timestamp(record.created).to_iso8601_string(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", {}))
+        return json.dumps(data, default=str)
+
+
+def start_listener() -> None:
+    global _listener  # pylint:disable=global-statement
+    records: queue.Queue = queue.Queue()
+    handler = logging.FileHandler(str(_path), encoding="utf-8", delay=True)
+    handler.setFormatter(JsonFormatter())
+    for old in [x for x in logger.handlers if isinstance(x, QueueHandler)]:
+        logger.removeHandler(old)
+    logger.addHandler(QueueHandler(records))
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    global _listener  # pylint:disable=global-statement
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure(path: Union[str, Path]) -> None:
+    """Writes the events into ``path`` from now on."""
+    global _path  # pylint:disable=global-statement
+    with _lock:
+        stop_listener()
+        _path = path
+
+
+def flush() -> None:
+    """Writes out all pending events."""
+    with _lock:
+        stop_listener()
+
+
+def event(kind: str, message: str = "", level: int = logging.INFO, **fields) -> None:
+    """Records an event, e.g. ``event("chapter", url=..., chapter=3, status=200, bytes=1234)``."""
+    if not _listener:
+        with _lock:
+            if not _listener:
+                start_listener()
+    logger.log(level, message or kind, extra={"fields": {"event": kind, **fields}})
+
+
+atexit.register(flush)
+
+
+class Progress(logging.Handler):
+    """Prints aggregated progress of concurrent downloads, at most once per ``interval`` seconds."""
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL, stream: Optional[TextIO] = None):
+        super().__init__()
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.chapters = 0
+        self.stories = 0
+        self.started = time.monotonic()
+        self.printed = self.started
+
+    def summary(self) -> str:
+        rate = self.chapters / max(time.monotonic() - self.started, 1e-6)
+        return f"{self.stories} stories done, {self.chapters} chapters downloaded ({rate:.1f} chapters/s)"
+
+    def emit(self, record: logging.LogRecord) -> None:
+        kind = getattr(record, "fields", {}).get("event")
+        if kind == "chapter":
+            self.chapters += 1
+        elif kind == "story":
+            self.stories += 1
+        now = time.monotonic()
+        if now - self.printed >= self.interval:
+            self.printed = now
+            print(self.summary(), file=self.stream, flush=True)
+
+    def __enter__(self) -> "Progress":
+        logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        logger.removeHandler(self)
+        print(self.summary(), file=self.stream, flush=True)
@@ -0,0 +1,90 @@
+"""Writes ebooks atomically and backs them up without copying, where the filesystem allows.
+
+A book is written into a temporary file next to it and renamed over the old one only
+when it's complete, so a crash never leaves a truncated book behind. Because the old
+file is replaced rather than rewritten, a backup can share its data: a reflink on
+filesystems with copy-on-write, a hardlink elsewhere, and a plain copy only as a last
+resort.
+"""
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# ioctl cloning a whole file on Linux (btrfs, XFS, ...).
+FICLONE = 0x40049409
+
+PathLike = Union[str, Path]
+
+
+@contextmanager
+def atomic_file(path: PathLike) -> Iterator[str]:
+    """Yields a temporary name to write into, which replaces ``path`` once the block succeeds."""
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield str(temporary)
+        with temporary.open("rb") as fp:
+            os.fsync(fp.fileno())
+        if path.exists():
+            shutil.copymode(path, temporary)
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+
+
+def reflink(source: PathLike, target: PathLike) -> bool:
+    """Clones the file, sharing its data, if the filesystem can; returns whether it did."""
+    if not fcntl or not hasattr(fcntl, "ioctl"):
+        return False
+    try:
+        with open(source, "rb") as src, open(target, "xb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                return True
+            except OSError:
+                pass
+    except OSError:
+        return False
+    os.unlink(target)
+    return False
+
+
+def clone(source: PathLike, target: PathLike) -> str:
+    """Copies the file as cheaply as the filesystem allows; returns how it was copied."""
+    if reflink(source, target):
+        return "reflink"
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(source, target)
+        return "copy"
+
+
+def backup_name(path: PathLike, generation: int = 1) -> Path:
+    return Path(f"{path}.bck" if generation == 1 else f"{path}.bck.{generation}")
+
+
+def backup(path: PathLike, generations: int = 1) -> Path:
+    """Backs the file up as ``<file>.bck``, keeping the older backups as ``<file>.bck.2`` and so on.
+
+    The backup may share its data with the file, which is safe as long as the file is
+    only ever replaced through :func:`atomic_file`, never rewritten in place.
+    """
+    for generation in range(generations, 1, -1):
+        if backup_name(path, generation - 1).exists():
+            os.replace(backup_name(path, generation - 1), backup_name(path, generation))
+    target = backup_name(path)
+    if target.exists():
+        target.unlink()
+    clone(path, target)
+    return target
@@ -0,0 +1,126 @@
+"""Embeds the images that chapters link to, so the ebook works offline.
+
+Images are fetched concurrently, stored once per distinct content, optionally scaled
+down or recompressed, and added until the book's image budget is used up. Images
+that don't fit, or can't be fetched, keep their original links.
+"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import attr
+from bs4 import BeautifulSoup  # type: ignore
+from ebooklib.epub import EpubBook, EpubHtml, EpubImage  # type: ignore
+from PIL import Image  # type: ignore
+
+IMAGE_FOLDER = "images"
+IMAGE_JOBS = 8
+MEGABYTE = 1024 * 1024
+
+FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "GIF": ("gif", "image/gif"),
+    "WEBP": ("webp", "image/webp"),
+}
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class ImageOptions:
+    max_size: Optional[int] = None
+    quality: Optional[int] = None
+    budget: float = 20 * MEGABYTE
+
+
+def process_image(content: bytes, options: ImageOptions) -> Optional[Tuple[bytes, str]]:
+    """Returns the image, scaled down or recompressed as the options say, and its format."""
+    try:
+        image = Image.open(BytesIO(content))
+        image_format = image.format
+    except (OSError, SyntaxError):
+        return None
+    if image_format not in FORMATS:
+        return None
+    if getattr(image, "is_animated", False):
+        return content, image_format
+    resize = bool(options.max_size) and max(image.size) > options.max_size
+    recompress = options.quality is not None and image_format in ("JPEG", "WEBP")
+    if not (resize or recompress):
+        return content, image_format
+    if resize:
+        image.thumbnail((options.max_size, options.max_size))
+    save: Dict[str, Any] = {"optimize": True}
+    if options.quality is not None and image_format in ("JPEG", "WEBP"):
+        save["quality"] = options.quality
+    with BytesIO() as b:
+        image.save(b, format=image_format, **save)
+        processed = b.getvalue()
+    return (processed, image_format) if resize or len(processed) < len(content) else (content, image_format)
+
+
+def remote_images(chapters: Iterable[EpubHtml]) -> List[str]:
+    """Lists the remote images of the chapters in the order they first appear."""
+    urls: Dict[str, None] = {}
+    for chapter in chapters:
+        if "<img" not in chapter.content:
+            continue
+        for image in BeautifulSoup(chapter.content, "html.parser").find_all("img", src=True):
+            if image["src"].startswith(("http://", "https://")):
+                urls.setdefault(image["src"])
+    return list(urls)
+
+
+@attr.s
+class ImageEmbedder:
+    fetch: Callable[[str], Any] = attr.ib()
+    options: ImageOptions = attr.ib(factory=ImageOptions)
+    items: Dict[str, EpubImage] = attr.ib(factory=dict)
+    used: int = attr.ib(default=0)
+
+    def keep(self, book: Optional[EpubBook]) -> None:
+        """Carries over the images embedded in the previous version of the book."""
+        for item in book.get_items() if book else []:
+            if isinstance(item, EpubImage) and item.file_name.startswith(f"{IMAGE_FOLDER}/"):
+                self.items[item.file_name] = item
+                self.used += len(item.content)
+
+    def download(self, url: str) -> Optional[Tuple[str, bytes, str]]:
+        try:
+            response = self.fetch(url)
+        except Exception:  # pylint:disable=broad-except
+            return None
+        if not response.ok:
+            return None
+        digest = hashlib.sha256(response.content).hexdigest()[:20]
+        processed = process_image(response.content, self.options)
+        return (digest, *processed) if processed else None
+
+    def embed(self, chapters: List[EpubHtml]) -> List[EpubImage]:
+        """Downloads the chapters' remote images, rewrites their links and returns all image items."""
+        urls = remote_images(chapters)
+        with ThreadPoolExecutor(max_workers=IMAGE_JOBS) as pool:
+            downloaded = list(pool.map(self.download, urls))
+        names: Dict[str, str] = {}
+        for url, image in zip(urls, downloaded):
+            if not image:
+                continue
+            digest, content, image_format = image
+            extension, media_type = FORMATS[image_format]
+            name = f"{IMAGE_FOLDER}/{digest}.{extension}"
+            if name not in self.items:
+                if self.used + len(content) > self.options.budget:
+                    continue
+                self.items[name] = EpubImage(
+                    uid=f"image-{digest}", file_name=name, media_type=media_type, content=content
+                )
+                self.used += len(content)
+            names[url] = name
+        for chapter in chapters if names else []:
+            if "<img" not in chapter.content:
+                continue
+            soup = BeautifulSoup(chapter.content, "html.parser")
+            for image in soup.find_all("img", src=True):
+                image["src"] = names.get(image["src"], image["src"])
+            chapter.content = str(soup)
+        return list(self.items.values())
@@ -1,3 +1,5 @@
+import html
+import logging
 import re
 import shutil
 from pathlib import Path
@@ -8,6 +10,8 @@ from bs4 import BeautifulSoup  # type: ignore
 from ebooklib import epub  # type: ignore
 from furl import furl  # type: ignore
 
+from pyffdl.utilities.events import event
+
 APP = "pyffdl"
 
 
@@ -33,8 +37,7 @@ def get_url_from_file(file: Union[str, click.Path]) -> Optional[furl]:
         return furl(url("a")[0]["href"])
     except AttributeError:
         error = f"File {file} doesn't contain requested information."
-        with open("pyffdl.log", "a") as fp:
-            click.echo(error, file=fp)
+        event("error", error, logging.WARNING, file=str(file))
         click.echo(error, err=True)
         return None
 
@@ -77,6 +80,49 @@ def clean_text(text: Iterable) -> str:
     return "".join(str(x) for x in parsed_text.body.contents)
 
 
+BLOCK_TAGS = (
+    "address|article|aside|blockquote|body|br|caption|dd|div|dl|dt|figcaption|figure|footer|h[1-6]|head|header"
+    "|hr|html|li|link|meta|nav|ol|p|section|style|table|tbody|td|tfoot|th|thead|title|tr|ul"
+)
+BLOCK_TAG = re.compile(rf"^</?(?:{BLOCK_TAGS})[\s/>]", re.IGNORECASE)
+EMPTY_ELEMENT = re.compile(r"<(b|big|blockquote|div|em|font|h[1-6]|i|p|s|small|span|strong|sub|sup|u)>( ?)</\1>")
+COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+TAG = re.compile(r"(<[^>]*>)")
+WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+
+
+def minify(text: str) -> str:
+    """Shrinks cleaned chapter text without changing how it renders.
+
+    Whitespace is collapsed, and dropped next to block elements. Comments and empty
+    elements without attributes are removed, empty inline ones leaving their space
+    behind, and entities are replaced by the characters they stand for. Attributes,
+    like the ``center`` class, and ``<pre>`` blocks are kept.
+    """
+    tokens = TAG.split(COMMENT.sub("", text))
+    preformatted = False
+    for index in range(0, len(tokens), 2):
+        if preformatted:
+            pass
+        elif tokens[index]:
+            chunk = html.escape(html.unescape(tokens[index]), quote=False)
+            chunk = WHITESPACE.sub(" ", chunk)
+            if index and BLOCK_TAG.match(tokens[index - 1]):
+                chunk = chunk.lstrip(" ")
+            if index + 1 < len(tokens) and BLOCK_TAG.match(tokens[index + 1]):
+                chunk = chunk.rstrip(" ")
+            tokens[index] = chunk
+        if index + 1 < len(tokens):
+            tag = tokens[index + 1].lower()
+            preformatted = tag.startswith("<pre") or preformatted and not tag.startswith("</pre")
+    minified = "".join(tokens)
+    while True:
+        shorter = EMPTY_ELEMENT.sub(lambda x: "" if BLOCK_TAG.match(x.group()) else x.group(2), minified)
+        if shorter == minified:
+            return minified
+        minified = shorter
+
+
 def ensure_data() -> Path:
     data_folder = Path(click.get_app_dir(APP))
     src_folder = Path(__file__).resolve().parents[1] / "data"
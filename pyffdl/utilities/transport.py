@@ -0,0 +1,141 @@
+"""HTTP transports the stories fetch their pages through.
+
+The default transport wraps the cloudscraper session, which gets past Cloudflare. The
+HTTP/2 one needs the optional ``httpx[http2]`` dependency and fetches many pages at
+once over a single multiplexed connection, which suits sites that don't hide behind
+Cloudflare, like AO3.
+"""
+import asyncio
+import threading
+from typing import Any, ClassVar, Dict, List, Mapping, Optional, Sequence
+
+import attr
+
+from pyffdl.utilities.cookies import CookieStore
+
+Headers = Optional[Dict[str, str]]
+
+MAX_STREAMS = 10
+
+
+@attr.s(auto_attribs=True)
+class TransportResponse:
+    """The parts of a response the stories use, whichever client fetched it."""
+
+    url: str
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str] = attr.ib(factory=dict)
+    encoding: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class Transport:
+    """Fetches pages one at a time, or several at once if the client can multiplex them."""
+
+    multiplexed: ClassVar[bool] = False
+
+    def get(self, url: str, headers: Headers = None) -> Any:
+        raise NotImplementedError
+
+    def get_many(self, urls: Sequence[str]) -> List[Any]:
+        return [self.get(url) for url in urls]
+
+    def close(self) -> None:
+        pass
+
+
+@attr.s
+class SessionTransport(Transport):
+    """Transport over a requests (or cloudscraper) session, optionally keeping its cookies on disk."""
+
+    session: Any = attr.ib()
+    cookies: Optional[CookieStore] = attr.ib(default=None)
+
+    def get(self, url: str, headers: Headers = None) -> Any:
+        if self.cookies:
+            self.cookies.load(self.session)
+        response = self.session.get(url, headers=headers)
+        if self.cookies:
+            self.cookies.save(self.session)
+        return response
+
+
+@attr.s
+class HTTP2Transport(Transport):
+    """Transport over httpx, with HTTP/2 and concurrent fetches on one connection."""
+
+    multiplexed: ClassVar[bool] = True
+
+    max_streams: int = attr.ib(default=MAX_STREAMS)
+    timeout: float = attr.ib(default=30)
+    _client: Any = attr.ib(init=False, default=None, repr=False)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def __attrs_post_init__(self):
+        try:
+            import httpx  # pylint:disable=import-outside-toplevel
+            import h2  # noqa: F401  pylint:disable=import-outside-toplevel,unused-import
+        except ImportError as e:
+            raise RuntimeError("HTTP/2 needs httpx, install pyffdl[http2].") from e
+        self.httpx = httpx
+
+    @staticmethod
+    def wrap(response: Any) -> TransportResponse:
+        return TransportResponse(
+            str(response.url), response.status_code, response.content, response.headers, response.encoding
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        return {"http2": True, "follow_redirects": True, "timeout": self.timeout}
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                self._client = self.httpx.Client(**self.client_options())
+            return self._client
+
+    def get(self, url: str, headers: Headers = None) -> TransportResponse:
+        return self.wrap(self.client.get(url, headers=headers))
+
+    async def get_async(self, client: Any, url: str, streams: asyncio.Semaphore) -> TransportResponse:
+        async with streams:
+            return self.wrap(await client.get(url))
+
+    async def get_all(self, urls: Sequence[str]) -> List[TransportResponse]:
+        streams = asyncio.Semaphore(self.max_streams)
+        async with self.httpx.AsyncClient(**self.client_options()) as client:
+            return list(await asyncio.gather(*(self.get_async(client, url, streams) for url in urls)))
+
+    def get_many(self, urls: Sequence[str]) -> List[TransportResponse]:
+        """Fetches all the pages concurrently, keeping at most ``max_streams`` requests in flight."""
+        if len(urls) < 2:
+            return [self.get(url) for url in urls]
+        return asyncio.run(self.get_all(urls))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+_http2: Optional[HTTP2Transport] = None
+_http2_lock = threading.Lock()
+
+
+def http2_transport() -> HTTP2Transport:
+    """Returns the HTTP/2 transport shared by all stories, so its connections get reused."""
+    global _http2  # pylint:disable=global-statement
+    with _http2_lock:
+        if _http2 is None:
+            _http2 = HTTP2Transport()
+        return _http2
@@ -0,0 +1,238 @@
+"""A lean EPUB writer for books assembled by pyffdl.
+
+Chapters coming out of the site cleaners are already well-formed, so unlike
+ebooklib's writer this one doesn't parse and re-serialise every document.
+"""
+import re
+import zipfile
+from html import escape
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
+
+import attr
+import pendulum
+from ebooklib.epub import (  # type: ignore
+    NAMESPACES,
+    EpubBook,
+    EpubCover,
+    EpubCoverHtml,
+    EpubHtml,
+    EpubItem,
+    EpubNav,
+    EpubNcx,
+    EpubWriter,
+    Link,
+)
+
+CONTAINER = """<?xml version="1.0" encoding="utf-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+<rootfiles><rootfile full-path="{folder}/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>
+"""
+
+DOCUMENT = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="{lang}" xml:lang="{lang}">
+<head><title>{title}</title>{links}</head>
+<body>{body}</body>
+</html>
+"""
+
+BODY = re.compile(r"<body[^>]*>(.*)</body>", re.DOTALL | re.IGNORECASE)
+
+
+@attr.s(frozen=True)
+class Compression:
+    """Decides how every file of the EPUB archive gets compressed."""
+
+    level: int = attr.ib(default=6)
+
+    LEVELS: ClassVar[Dict[str, int]] = {"store": 0, "fast": 1, "default": 6, "max": 9}
+    STORED: ClassVar[Tuple[str, ...]] = ("mimetype", ".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+    @classmethod
+    def named(cls, name: str) -> "Compression":
+        return cls(cls.LEVELS[name])
+
+    def settings(self, name: str) -> Tuple[int, Optional[int]]:
+        """Returns the compression type and level for a file in the archive."""
+        if not self.level or name.lower().endswith(self.STORED):
+            return zipfile.ZIP_STORED, None
+        return zipfile.ZIP_DEFLATED, self.level
+
+
+class EpubZipFile(zipfile.ZipFile):
+    """Zip archive that compresses its members according to a :class:`Compression` policy."""
+
+    def __init__(self, file: str, compression: Compression):
+        super().__init__(file, "w", zipfile.ZIP_DEFLATED)
+        self.compression = compression
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if compress_type is None and isinstance(zinfo_or_arcname, str):
+            compress_type, compresslevel = self.compression.settings(zinfo_or_arcname)
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+
+class CompressedEpubWriter(EpubWriter):
+    def __init__(self, name, book, options=None, compression: Compression = Compression()):
+        super().__init__(name, book, options)
+        self.compression = compression
+
+    def write(self):
+        self.out = EpubZipFile(self.file_name, self.compression)
+        self.out.writestr("mimetype", "application/epub+zip")
+
+        self._write_container()
+        self._write_opf()
+        self._write_items()
+
+        self.out.close()
+
+
+def attributes(attrs: Optional[dict]) -> str:
+    return "".join(f' {key}="{escape(str(value))}"' for key, value in (attrs or {}).items())
+
+
+def body_of(content: Union[str, bytes]) -> str:
+    """Returns the inner body of a document, or the content itself if it's just a fragment."""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    match = BODY.search(content)
+    return match.group(1) if match else content
+
+
+def toc_entries(book: EpubBook) -> Iterator[Tuple[str, str]]:
+    """Yields ``(href, title)`` for every entry in a flat table of contents."""
+    for entry in book.toc:
+        if isinstance(entry, Link):
+            yield entry.href, entry.title
+        elif isinstance(entry, EpubHtml):
+            yield entry.file_name, entry.title
+
+
+def spine_entries(book: EpubBook) -> Iterator[Tuple[str, bool]]:
+    """Yields ``(idref, is_linear)`` for every entry of the spine."""
+    for entry in book.spine:
+        linear = True
+        if isinstance(entry, tuple):
+            entry, *rest = entry
+            linear = not (rest and rest[0] == "no")
+        if isinstance(entry, EpubItem):
+            yield entry.get_id(), linear and entry.is_linear
+        else:
+            item = book.get_item_with_id(entry)
+            yield entry, linear and getattr(item, "is_linear", True)
+
+
+def make_document(item: EpubHtml, lang: str) -> bytes:
+    links = "".join(f"<link{attributes(link)}/>" for link in item.links)
+    return DOCUMENT.format(
+        lang=escape(item.lang or lang),
+        title=escape(item.title or ""),
+        links=links,
+        body=body_of(item.content),
+    ).encode("utf-8")
+
+
+def make_opf(book: EpubBook) -> bytes:
+    metadata: List[str] = [
+        f'<meta property="dcterms:modified">{pendulum.now("UTC").format("YYYY-MM-DDTHH:mm:ss")}Z</meta>'
+    ]
+    for name, values in book.metadata.get(NAMESPACES["DC"], {}).items():
+        for value, attrs in values:
+            metadata.append(f"<dc:{name}{attributes(attrs)}>{escape(value)}</dc:{name}>")
+    for values in book.metadata.get(NAMESPACES["OPF"], {}).values():
+        for value, attrs in values:
+            metadata.append(f"<meta{attributes(attrs)}>{escape(value or '')}</meta>")
+
+    manifest: List[str] = []
+    ncx_id = "ncx"
+    for item in book.get_items():
+        if not item.manifest:
+            continue
+        opts: dict[str, Any] = {"href": item.file_name, "id": item.id, "media-type": item.media_type}
+        if isinstance(item, EpubNav):
+            opts["properties"] = "nav"
+        elif isinstance(item, EpubCover):
+            opts["properties"] = "cover-image"
+        elif isinstance(item, EpubNcx):
+            ncx_id = item.id
+        elif getattr(item, "properties", None):
+            opts["properties"] = " ".join(item.properties)
+        manifest.append(f"<item{attributes(opts)}/>")
+
+    spine = [
+        f"<itemref{attributes({'idref': idref} if linear else {'idref': idref, 'linear': 'no'})}/>"
+        for idref, linear in spine_entries(book)
+    ]
+
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<package xmlns="{NAMESPACES["OPF"]}" unique-identifier="{book.IDENTIFIER_ID}" version="3.0">\n'
+        f'<metadata xmlns:dc="{NAMESPACES["DC"]}" xmlns:opf="{NAMESPACES["OPF"]}">\n'
+        + "\n".join(metadata)
+        + "\n</metadata>\n<manifest>\n"
+        + "\n".join(manifest)
+        + f'\n</manifest>\n<spine toc="{escape(ncx_id)}">\n'
+        + "\n".join(spine)
+        + "\n</spine>\n</package>\n"
+    ).encode("utf-8")
+
+
+def make_nav(book: EpubBook) -> bytes:
+    entries = "".join(
+        f'<li><a href="{escape(href)}">{escape(title)}</a></li>' for href, title in toc_entries(book)
+    )
+    body = (
+        f'<nav epub:type="toc" id="id" role="doc-toc"><h2>{escape(book.title)}</h2><ol>{entries}</ol></nav>'
+    )
+    return DOCUMENT.format(
+        lang=escape(book.language or "en"), title=escape(book.title), links="", body=body
+    ).encode("utf-8")
+
+
+def make_ncx(book: EpubBook) -> bytes:
+    points = "".join(
+        f'<navPoint id="navpoint-{order}" playOrder="{order}"><navLabel><text>{escape(title)}</text></navLabel>'
+        f'<content src="{escape(href)}"/></navPoint>'
+        for order, (href, title) in enumerate(toc_entries(book), start=1)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+        f'<head><meta name="dtb:uid" content="{escape(book.uid or "")}"/><meta name="dtb:depth" content="1"/>'
+        '<meta name="dtb:totalPageCount" content="0"/><meta name="dtb:maxPageNumber" content="0"/></head>\n'
+        f"<docTitle><text>{escape(book.title)}</text></docTitle>\n"
+        f"<navMap>{points}</navMap>\n</ncx>\n"
+    ).encode("utf-8")
+
+
+def write_epub(
+    name: str, book: EpubBook, options: Optional[dict] = None, compression: Compression = Compression()
+) -> None:
+    """Writes the book through ebooklib, compressing the archive according to ``compression``."""
+    writer = CompressedEpubWriter(name, book, options, compression)
+    writer.process()
+    writer.write()
+
+
+def write_epub_fast(name: str, book: EpubBook, compression: Compression = Compression()) -> None:
+    """Writes the book into ``name`` without re-tidying its documents."""
+    folder = book.FOLDER_NAME
+    lang = book.language or "en"
+    with EpubZipFile(name, compression) as out:
+        out.writestr("mimetype", "application/epub+zip")
+        out.writestr("META-INF/container.xml", CONTAINER.format(folder=folder))
+        out.writestr(f"{folder}/content.opf", make_opf(book))
+        for item in book.get_items():
+            if isinstance(item, EpubNcx):
+                content = make_ncx(book)
+            elif isinstance(item, EpubNav):
+                content = make_nav(book)
+            elif isinstance(item, EpubCoverHtml):
+                content = item.get_content()
+            elif isinstance(item, EpubHtml):
+                content = make_document(item, lang)
+            else:
+                content = item.get_content()
+            out.writestr(f"{folder}/{item.file_name}" if item.manifest else item.file_name, content)
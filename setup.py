@@ -37,6 +37,11 @@ REQUIRED = [
 ]
 DEPENDENCY = []
 
+# What packages are optional?
+EXTRAS = {
+    "http2": ["httpx[http2]>=0.23"],
+}
+
 # The rest you shouldn't have to touch too much :)
 # ------------------------------------------------
 # Except, perhaps the License and Trove Classifiers!
@@ -110,6 +115,7 @@ setup(
     # py_modules=['mypackage'],
     entry_points={"console_scripts": ["pyffdl=pyffdl:cli"]},
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     dependency_links=DEPENDENCY,
     include_package_data=True,
     license="MIT",
@@ -0,0 +1,12 @@
+import pytest
+
+from pyffdl.utilities import events
+
+
+@pytest.fixture(autouse=True)
+def event_log(tmp_path):
+    """Keeps the event log of every test in its own folder, out of the working directory."""
+    path = tmp_path / "pyffdl.log"
+    events.configure(path)
+    yield path
+    events.flush()
@@ -0,0 +1,72 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from pyffdl.sites.ao3 import *
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+PAGES = Path("./tests/data/ao3/")
+
+
+class SavedWork(Transport):
+    """Serves the saved pages of a three-chapter work, recording every request."""
+
+    def __init__(self, full_work: bytes = None, status: int = 200):
+        self.urls = []
+        self.full_work = (PAGES / "full-work.html").read_bytes() if full_work is None else full_work
+        self.status = status
+
+    def get(self, url, headers=None):
+        self.urls.append(url)
+        if "view_full_work" in url:
+            return TransportResponse(url, self.status, self.full_work)
+        name = next((f"chapter-{x}.html" for x in (2, 3) if f"/chapters/10{x}" in url), "work.html")
+        return TransportResponse(url, 200, (PAGES / name).read_bytes())
+
+
+def open_work(transport: SavedWork) -> ArchiveOfOurOwnStory:
+    story = ArchiveOfOurOwnStory("https://archiveofourown.org/works/1000", verbose=False, transport=transport)
+    story.get_chapters()
+    return story
+
+
+def test_full_work():
+    transport = SavedWork()
+    story = open_work(transport)
+    chapters = story.prefetch_chapters([1, 2, 3])
+    assert len(transport.urls) == 2
+    assert "view_full_work=true" in transport.urls[1]
+    assert "/works/1000?" in transport.urls[1]
+    for number in (1, 2, 3):
+        assert f"Text of chapter {number}." in chapters[number]
+        assert f"More of chapter {number}." in chapters[number]
+        assert "Chapter Text" not in chapters[number]
+
+
+def test_few_missing_chapters_skip_full_work():
+    transport = SavedWork()
+    story = open_work(transport)
+    assert story.prefetch_chapters([3]) == {}
+    assert len(transport.urls) == 1
+
+
+@pytest.mark.parametrize("fault", ["status", "count"])
+def test_full_work_falls_back(fault, tmp_path):
+    if fault == "status":
+        transport = SavedWork(status=503)
+    else:
+        page = BeautifulSoup((PAGES / "full-work.html").read_bytes(), "html5lib")
+        page.select("div#chapters > div.chapter")[-1].decompose()
+        transport = SavedWork(str(page).encode("utf-8"))
+    story = open_work(transport)
+    assert story.prefetch_chapters([1, 2, 3]) == {}
+    story.filename = str(tmp_path / "work.epub")
+    story.run()
+    chapter_requests = [x for x in transport.urls if "/chapters/" in x and "view_full_work" not in x]
+    assert any("/chapters/102" in x for x in chapter_requests)
+    assert any("/chapters/103" in x for x in chapter_requests)
+    with zipfile.ZipFile(story.filename) as archive:
+        for number in (1, 2, 3):
+            assert f"Text of chapter {number}." in archive.read(f"EPUB/chapter0{number}.xhtml").decode("utf-8")
@@ -0,0 +1,112 @@
+import threading
+
+from bs4.element import Tag
+from furl import furl
+
+from pyffdl.core import app
+from pyffdl.core.app import *
+from pyffdl.sites.story import Story
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+
+class Pages(Transport):
+    """Serves a two-chapter story under any URL, recording every request."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, headers=None):
+        self.urls.append(url)
+        if "chapter=" in url:
+            text = "<p>Chapter text.</p>"
+        else:
+            options = '<option value="1">One</option><option value="2">Two</option>'
+            text = f'<html><body><select id="chapters">{options}</select></body></html>'
+        return TransportResponse(url, 200, text.encode("utf-8"))
+
+
+class TwoChapters(Story):
+    pages = Pages()
+
+    @classmethod
+    def parse(cls, url, verbose, force, **options):
+        return cls(url, verbose=verbose, force=force, transport=cls.pages, **options)
+
+    @staticmethod
+    def get_raw_text(response):
+        return response.text
+
+    @staticmethod
+    def chapter_parser(value: Tag):
+        return value["value"], value.text
+
+    @property
+    def select(self):
+        return "select#chapters option"
+
+    def make_title_page(self):
+        self.metadata.title = self.url.path.segments[-1]
+        self.metadata.author.name = "Author"  # pylint:disable=assigning-non-slot
+        self.metadata.language = "English"
+
+    def make_new_chapter_url(self, url, value):
+        return url.copy().set(args={"chapter": value})
+
+
+def test_download_pipelined(tmp_path, monkeypatch):
+    transport = Pages()
+    prepared = []
+    second_prepared = threading.Event()
+
+    class PipelinedStory(TwoChapters):
+        pages = transport
+
+        def prepare(self):
+            if not self.prepared:
+                prepared.append(self.url.path.segments[-1])
+            super().prepare()
+            if self.url.path.segments[-1] == "second":
+                second_prepared.set()
+
+        def make_ebook(self):
+            if self.url.path.segments[-1] == "first":
+                # The next story is prepared while this one downloads.
+                assert second_prepared.wait(5)
+            super().make_ebook()
+
+    monkeypatch.setattr(app, "get_site", lambda url: PipelinedStory)
+    urls = [URL(furl(f"https://example.com/{x}"), str(tmp_path / f"{x}.epub")) for x in ("first", "second")]
+    download(urls, pipeline=True)
+    assert prepared == ["first", "second"]
+    for name in ("first", "second"):
+        assert transport.urls.count(f"https://example.com/{name}") == 1
+        assert (tmp_path / f"{name}.epub").exists()
+    assert len(transport.urls) == 6
+
+
+def test_download_scheduled(tmp_path, monkeypatch):
+    class ScheduledStory(TwoChapters):
+        pages = Pages()
+
+    monkeypatch.setattr(app, "get_site", lambda url: ScheduledStory)
+    monkeypatch.chdir(tmp_path)
+    download([URL(furl(f"https://example.com/{x}")) for x in ("first", "second")], schedule="shortest")
+    for name in ("first", "second"):
+        # The main page fetched to plan the batch is reused for the download.
+        assert ScheduledStory.pages.urls.count(f"https://example.com/{name}") == 1
+        assert (tmp_path / f"Author - {name}.epub").exists()
+
+
+def test_story_options(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+
+    calls = []
+    monkeypatch.setattr(app, "download", lambda urls, *args, **kwargs: calls.append((list(urls), kwargs)))
+    arguments = ["--minify", "--images", "--image-budget", "1", "https://example.com/1"]
+    result = CliRunner().invoke(cli, ["--log-file", str(tmp_path / "pyffdl.log"), "download", *arguments])
+    assert result.exit_code == 0, result.output
+    [(urls, options)] = calls
+    assert [x.url.tostr() for x in urls] == ["https://example.com/1"]
+    assert options["minify"] and not options["http2"]
+    assert options["images"].budget == MEGABYTE
+    assert options["jobs"] == 1 and options["compression"] == "default"
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+from furl import furl
+
+from pyffdl.core.author import *
+from pyffdl.sites import ArchiveOfOurOwnStory, FanFictionNetStory, TwistingTheHellmouthStory
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+PAGES = Path("./tests/data/authors/")
+
+
+def page(name: str) -> BeautifulSoup:
+    return BeautifulSoup((PAGES / name).read_text(), "html5lib")
+
+
+@pytest.mark.parametrize(
+    "site,url,works",
+    [
+        (FanFictionNetStory, "https://www.fanfiction.net/u/123/Author", "https://www.fanfiction.net/u/123/Author"),
+        (FanFictionNetStory, "https://www.fanfiction.net/s/1/1/", None),
+        (FanFictionNetStory, "https://www.fanfiction.net", None),
+        (ArchiveOfOurOwnStory, "https://archiveofourown.org/users/me", "https://archiveofourown.org/users/me/works"),
+        (
+            ArchiveOfOurOwnStory,
+            "https://archiveofourown.org/users/writer/pseuds/alias/profile",
+            "https://archiveofourown.org/users/writer/pseuds/alias/works",
+        ),
+        (ArchiveOfOurOwnStory, "https://archiveofourown.org/works/1", None),
+        (ArchiveOfOurOwnStory, "https://archiveofourown.org", None),
+        (
+            TwistingTheHellmouthStory,
+            "https://www.tthfanfic.org/AuthorStories-5000/SomeAuthor.htm",
+            "https://www.tthfanfic.org/AuthorStories-5000/SomeAuthor.htm",
+        ),
+        (TwistingTheHellmouthStory, "https://www.tthfanfic.org/Story-1/Title.htm", None),
+        (TwistingTheHellmouthStory, "https://www.tthfanfic.org", None),
+    ],
+)
+def test_author_works_url(site, url, works):
+    found = site.author_works_url(furl(url))
+    assert (found.url if found else None) == works
+
+
+def test_list_works_ffnet():
+    url = furl("https://www.fanfiction.net/u/123/Some-Author")
+    works, next_page = FanFictionNetStory.list_works(page("ffnet.html"), url)
+    assert [x.url for x in works] == [
+        "https://www.fanfiction.net/s/1234567/1/First-Story",
+        "https://www.fanfiction.net/s/7654321/1/Second-Story",
+    ]
+    assert next_page is None
+
+
+def test_list_works_ao3():
+    url = furl("https://archiveofourown.org/users/writer/pseuds/writer/works")
+    works, next_page = ArchiveOfOurOwnStory.list_works(page("ao3-1.html"), url)
+    assert [x.url for x in works] == [f"https://archiveofourown.org/works/{x}" for x in (1001, 1002)]
+    assert next_page.url == "https://archiveofourown.org/users/writer/pseuds/writer/works?page=2"
+    works, next_page = ArchiveOfOurOwnStory.list_works(page("ao3-2.html"), next_page)
+    assert [x.url for x in works] == ["https://archiveofourown.org/works/1003"]
+    assert next_page is None
+
+
+def test_list_works_tth():
+    url = furl("https://www.tthfanfic.org/AuthorStories-5000/SomeAuthor.htm")
+    works, next_page = TwistingTheHellmouthStory.list_works(page("tth.html"), url)
+    assert [x.url for x in works] == [
+        "https://www.tthfanfic.org/Story-30001/SomeAuthor+First+Story.htm",
+        "https://www.tthfanfic.org/Story-30002/SomeAuthor+Second+Story.htm",
+    ]
+    assert next_page is None
+
+
+def test_author_works_follows_pages():
+    class SavedPages(Transport):
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url, headers=None):
+            self.urls.append(url)
+            name = "ao3-2.html" if "page=2" in url else "ao3-1.html"
+            return TransportResponse(url, 200, (PAGES / name).read_bytes())
+
+    transport = SavedPages()
+    works = author_works(furl("https://archiveofourown.org/users/writer/pseuds/writer"), transport)
+    assert [x.url for x in works] == [f"https://archiveofourown.org/works/{x}" for x in (1001, 1002, 1003)]
+    assert len(transport.urls) == 2
@@ -0,0 +1,35 @@
+from ebooklib.epub import EpubBook
+
+from pyffdl.utilities.chapters import *
+
+
+def test_conditional_headers():
+    assert ChapterRecord("abc").conditional_headers == {}
+    assert ChapterRecord("abc", etag='"1"', last_modified="Mon").conditional_headers == {
+        "If-None-Match": '"1"',
+        "If-Modified-Since": "Mon",
+    }
+
+
+def test_chapter_index_roundtrip():
+    index = ChapterIndex()
+    index[1] = ChapterRecord(content_hash("foo"), etag='"1"')
+    index[2] = ChapterRecord(content_hash("bar"))
+    book = EpubBook()
+    book.add_item(index.to_item())
+    assert ChapterIndex.from_book(book) == index
+    assert ChapterIndex.from_book(None) == ChapterIndex()
+    assert ChapterIndex.from_book(EpubBook()).get(1) is None
+
+
+def test_chapter_index_volume():
+    index = ChapterIndex()
+    index[1] = ChapterRecord(content_hash("foo"))
+    index[2] = ChapterRecord(content_hash("bar"))
+    volume = {"number": 2, "first": 2, "max_chapters": 1, "max_mb": None}
+    book = EpubBook()
+    book.add_item(index.to_item([2], volume))
+    stored = ChapterIndex.from_book(book)
+    assert stored.get(1) is None
+    assert stored.get(2) == index.get(2)
+    assert stored.volume == volume
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import warnings
+import zipfile
+
+from bs4 import BeautifulSoup
+from ebooklib.epub import EpubHtml
+from furl import furl
+
+from pyffdl.core.check import *
+from pyffdl.sites.story import Author, Metadata, Story
+from pyffdl.utilities.transport import Transport, TransportResponse
+from pyffdl.utilities.writer import write_epub_fast
+
+
+class MainPage(Transport):
+    def get(self, url, headers=None):
+        return TransportResponse(url, 200, b"<html><body></body></html>")
+
+
+def make_book(path, chapters, url="https://www.fanfiction.net/s/1/1/"):
+    """Writes an ebook the way pyffdl does, with its real title page."""
+    story = Story(url, verbose=False, transport=MainPage())
+    story.metadata = Metadata(furl(url))
+    story.metadata.title = "Title"
+    story.metadata.author = Author("Author", furl("https://www.fanfiction.net/u/1/Author"))
+    story.metadata.language = "English"
+    story.metadata.chapters = [str(x) for x in range(1, chapters + 1)]
+    story.cover = b"\xff\xd8\xff"
+    book = story.assemble(
+        [
+            EpubHtml(title=str(x), file_name=f"chapter{x:02}.xhtml", uid=f"chapter{x:02}", content="<p>Text</p>")
+            for x in range(1, chapters + 1)
+        ],
+        None,
+    )
+    write_epub_fast(str(path), book)
+
+
+def test_read_book(tmp_path):
+    make_book(tmp_path / "a.epub", 3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        url, chapters = read_book(tmp_path / "a.epub")
+    assert url.tostr() == "https://www.fanfiction.net/s/1/1/"
+    assert chapters == 3
+    with zipfile.ZipFile(tmp_path / "a.epub") as archive:
+        assert BeautifulSoup(archive.read("EPUB/title.xhtml"), "xml").find(id=URL_IDS[0])
+
+
+def test_find_books(tmp_path):
+    (tmp_path / "sub").mkdir()
+    make_book(tmp_path / "a.epub", 1)
+    make_book(tmp_path / "sub" / "b.epub", 1)
+    (tmp_path / "notes.txt").write_text("")
+    assert [x.name for x in find_books([tmp_path])] == ["a.epub", "b.epub"]
+
+
+def test_unsupported(tmp_path):
+    make_book(tmp_path / "a.epub", 2, "https://example.com/story")
+    status = check_book(tmp_path / "a.epub")
+    assert status.stored == 2
+    assert status.error and not status.stale
+
+
+def test_report():
+    statuses = [BookStatus("a.epub", "https://example.com/1", 3, 5), BookStatus("b.epub", error="Broken")]
+    assert statuses[0].stale and statuses[0].new == 2
+    fp = io.StringIO()
+    write_report(statuses, fp)
+    assert json.loads(fp.getvalue())[0]["new"] == 2
+    fp = io.StringIO()
+    write_report(statuses, fp, "csv")
+    rows = list(csv.DictReader(io.StringIO(fp.getvalue())))
+    assert rows[1]["error"] == "Broken"
@@ -0,0 +1,46 @@
+import time
+
+from requests import Session
+
+from pyffdl.utilities.cookies import *
+
+
+def test_share_cookies(tmp_path):
+    path = tmp_path / "cookies.json"
+    first = Session()
+    first.headers["User-Agent"] = "Agent/1.0"
+    first.cookies.set("cf_clearance", "token", domain=".example.com", path="/", expires=int(time.time()) + 3600)
+    first.cookies.set("old", "gone", domain=".example.com", path="/", expires=int(time.time()) - 10)
+    first.cookies.set("session", "abc", domain="www.example.org", path="/")
+    CookieStore(path).save(first)
+
+    second = Session()
+    CookieStore(path).load(second)
+    assert second.headers["User-Agent"] == "Agent/1.0"
+    assert second.cookies.get("cf_clearance", domain=".example.com") == "token"
+    assert second.cookies.get("session", domain="www.example.org") == "abc"
+    assert "old" not in second.cookies
+
+
+def test_merge(tmp_path):
+    path = tmp_path / "cookies.json"
+    first, second = Session(), Session()
+    first.cookies.set("a", "1", domain=".example.com", path="/")
+    second.cookies.set("b", "2", domain=".example.com", path="/")
+    CookieStore(path).save(first)
+    CookieStore(path).save(second)
+    third = Session()
+    CookieStore(path).load(third)
+    assert (third.cookies.get("a"), third.cookies.get("b")) == ("1", "2")
+
+
+def test_skip_unchanged(tmp_path):
+    path = tmp_path / "cookies.json"
+    store = CookieStore(path)
+    session = Session()
+    store.load(session)
+    store.save(session)
+    assert not path.exists()
+    session.cookies.set("a", "1", domain=".example.com", path="/")
+    store.save(session)
+    assert path.exists()
@@ -0,0 +1,25 @@
+import io
+import json
+
+from pyffdl.utilities import events
+
+
+def test_event_log(event_log):
+    events.event("request", url="https://example.com/", status=200, bytes=10, latency=0.5)
+    events.event("message", "Downloading https://example.com/")
+    events.flush()
+    lines = [json.loads(x) for x in event_log.read_text().splitlines()]
+    assert [x["event"] for x in lines] == ["request", "message"]
+    assert lines[0]["status"] == 200 and lines[0]["latency"] == 0.5
+    assert lines[1]["message"] == "Downloading https://example.com/"
+
+
+def test_progress():
+    stream = io.StringIO()
+    with events.Progress(interval=3600, stream=stream) as progress:
+        for number in range(1, 4):
+            events.event("chapter", chapter=number)
+        events.event("story")
+    assert (progress.chapters, progress.stories) == (3, 1)
+    assert stream.getvalue().startswith("1 stories done, 3 chapters downloaded")
+    events.flush()
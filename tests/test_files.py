@@ -0,0 +1,33 @@
+import pytest
+
+from pyffdl.utilities.files import *
+
+
+def test_atomic_file(tmp_path):
+    path = tmp_path / "story.epub"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_file(path) as temporary:
+            with open(temporary, "w") as fp:
+                fp.write("half")
+            raise RuntimeError
+    assert path.read_text() == "old"
+    with atomic_file(path) as temporary:
+        with open(temporary, "w") as fp:
+            fp.write("new")
+    assert path.read_text() == "new"
+    assert [x.name for x in tmp_path.iterdir()] == ["story.epub"]
+
+
+def test_backup_generations(tmp_path):
+    path = tmp_path / "story.epub"
+    for version in ("one", "two", "three"):
+        path.write_text(version)
+        backup(path, 2)
+        with atomic_file(path) as temporary:
+            with open(temporary, "w") as fp:
+                fp.write("updated")
+    assert backup_name(path).read_text() == "three"
+    assert backup_name(path, 2).read_text() == "two"
+    assert not backup_name(path, 3).exists()
+    assert path.read_text() == "updated"
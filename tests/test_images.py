@@ -0,0 +1,65 @@
+from io import BytesIO
+
+from ebooklib.epub import EpubHtml
+from PIL import Image
+
+from pyffdl.utilities.images import *
+
+
+def make_image(color, size=(400, 300), image_format="PNG"):
+    with BytesIO() as b:
+        Image.new("RGB", size, color).save(b, format=image_format)
+        return b.getvalue()
+
+
+class Response:
+    def __init__(self, content, ok=True):
+        self.content = content
+        self.ok = ok
+
+
+IMAGES = {
+    "https://example.com/a.png": make_image("red"),
+    "https://example.com/b.png": make_image("red"),
+    "https://example.com/c.jpg": make_image("blue", image_format="JPEG"),
+}
+
+
+def fetch(url):
+    return Response(IMAGES[url]) if url in IMAGES else Response(b"", ok=False)
+
+
+def chapter(number, *sources):
+    images = "".join(f'<p><img src="{x}" alt=""/></p>' for x in sources)
+    return EpubHtml(title=str(number), file_name=f"chapter{number}.xhtml", content=f"<h1>{number}</h1>{images}")
+
+
+def test_process_image():
+    content, image_format = process_image(IMAGES["https://example.com/a.png"], ImageOptions(max_size=100))
+    assert image_format == "PNG"
+    assert Image.open(BytesIO(content)).size == (100, 75)
+    assert process_image(IMAGES["https://example.com/a.png"], ImageOptions()) == (IMAGES["https://example.com/a.png"], "PNG")
+    assert process_image(b"not an image", ImageOptions()) is None
+
+
+def test_embed():
+    chapters = [
+        chapter(1, "https://example.com/a.png", "https://example.com/missing.png"),
+        chapter(2, "https://example.com/b.png", "images/local.png"),
+        chapter(3, "https://example.com/c.jpg"),
+    ]
+    items = ImageEmbedder(fetch).embed(chapters)
+    assert sorted(x.media_type for x in items) == ["image/jpeg", "image/png"]
+    png = next(x.file_name for x in items if x.media_type == "image/png")
+    assert f'src="{png}"' in chapters[0].content
+    assert 'src="https://example.com/missing.png"' in chapters[0].content
+    assert f'src="{png}"' in chapters[1].content
+    assert 'src="images/local.png"' in chapters[1].content
+
+
+def test_budget():
+    chapters = [chapter(1, "https://example.com/a.png"), chapter(2, "https://example.com/c.jpg")]
+    budget = len(IMAGES["https://example.com/a.png"])
+    items = ImageEmbedder(fetch, ImageOptions(budget=budget)).embed(chapters)
+    assert [x.media_type for x in items] == ["image/png"]
+    assert 'src="https://example.com/c.jpg"' in chapters[1].content
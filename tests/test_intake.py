@@ -0,0 +1,37 @@
+from pyffdl.core.intake import *
+
+
+def test_seen_set():
+    seen = SeenSet(capacity=4)
+    assert all(seen.add(f"key{x}") for x in range(1000))
+    assert not seen.add("key500")
+    assert "key999" in seen and "key1000" not in seen
+    assert len(seen) == 1000
+
+
+def test_read_urls():
+    lines = ["https://example.com/1\n", "\n", "# comment\n", "  https://example.com/2  \n"]
+    assert list(read_urls(lines)) == ["https://example.com/1", "https://example.com/2"]
+
+
+def test_story_key():
+    assert story_key("https://www.fanfiction.net/s/123/5/Title") == "fanfiction.net:123"
+    assert story_key("https://m.fanfiction.net/s/123/1/") == "fanfiction.net:123"
+    assert story_key("https://archiveofourown.org/works/9/chapters/77") == "archiveofourown.org:9"
+    assert story_key("https://www.tthfanfic.org/Story-4321-2/Title.htm") == "tthfanfic.org:4321"
+    assert story_key("https://EXAMPLE.com/story/#top") == "https://example.com/story"
+
+
+def test_unique_urls():
+    urls = read_urls([
+        "https://www.fanfiction.net/s/123/1/",
+        "https://www.fanfiction.net/s/123/5/",
+        "https://archiveofourown.org/works/9",
+        "https://www.fanfiction.net/s/124/1/",
+        "https://archiveofourown.org/works/9/chapters/77",
+    ])
+    assert list(unique_urls(urls)) == [
+        "https://www.fanfiction.net/s/123/1/",
+        "https://archiveofourown.org/works/9",
+        "https://www.fanfiction.net/s/124/1/",
+    ]
@@ -0,0 +1,45 @@
+import pytest
+
+from pyffdl.core.jobqueue import *
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "queue.sqlite")
+
+
+def test_claim_and_complete(queue):
+    first = queue.add("download", url="https://example.com/1")
+    queue.add("update", file="book.epub", force=True)
+    with pytest.raises(JobError):
+        queue.add("delete")
+
+    job = queue.claim("a")
+    assert job.id == first
+    assert (job.status, job.worker, job.attempts) == ("leased", "a", 1)
+    assert queue.claim("b").file == "book.epub"
+    assert queue.claim("c") is None
+
+    queue.complete(first, "a", "story.epub")
+    assert queue.get(first).result == "story.epub"
+    assert queue.counts() == {"done": 1, "leased": 1}
+
+
+def test_expired_lease_is_reclaimed(queue):
+    job_id = queue.add("download", url="https://example.com/1", max_attempts=2)
+    queue.claim("a", lease=-1)
+    assert not queue.renew(job_id, "b")
+    job = queue.claim("b", lease=-1)
+    assert (job.worker, job.attempts) == ("b", 2)
+    assert queue.claim("c") is None
+    assert queue.get(job_id).status == "failed"
+
+
+def test_failed_job_is_retried(queue):
+    job_id = queue.add("download", url="https://example.com/1", max_attempts=2)
+    queue.fail(queue.claim("a").id, "a", "boom")
+    assert queue.get(job_id).status == "queued"
+    queue.fail(queue.claim("a").id, "a", "boom again")
+    job = queue.get(job_id)
+    assert (job.status, job.error) == ("failed", "boom again")
+    assert [x.id for x in queue.jobs("failed")] == [job_id]
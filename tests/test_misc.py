@@ -76,4 +76,10 @@ def test_split():
     with pytest.raises(TypeError):
         split(0)
     with pytest.raises(TypeError):
-        split(["foo, bar"])
\ No newline at end of file
+        split(["foo, bar"])
+
+
+def test_minify():
+    text = '<h1>One</h1>\n\n<p>It was &hellip; <em>dark</em> <!-- ad --></p>\n\n<p class="center">* * *</p>\n\n<p> </p>'
+    assert minify(text) == '<h1>One</h1><p>It was … <em>dark</em></p><p class="center">* * *</p>'
+    assert minify("<p>a<span></span> b &amp; c</p><pre> x\n y</pre>") == "<p>a b &amp; c</p><pre> x\n y</pre>"
@@ -0,0 +1,29 @@
+from furl import furl
+
+from pyffdl.sites import FanFictionNetStory, HTMLStory
+from pyffdl.sites.registry import *
+
+
+def test_match():
+    registry = SiteRegistry(dict(BUILTIN_SITES), plugins=False)
+    assert registry.match("fanfiction.net") == "fanfiction.net"
+    assert registry.match("m.fanfiction.net") == "fanfiction.net"
+    assert registry.match("WWW.FictionPress.com") == "fictionpress.com"
+    assert registry.match("notfanfiction.net") is None
+    assert registry.match("fanfiction.net.example.com") is None
+    assert registry.match("") is None
+
+
+def test_get():
+    registry = SiteRegistry(dict(BUILTIN_SITES), plugins=False)
+    assert registry.get(furl("https://m.fanfiction.net/s/1/1/")) is FanFictionNetStory
+    assert registry.get(furl("https://example.com/")) is None
+    registry.register("example.com", "pyffdl.sites.html:HTMLStory")
+    assert registry.get(furl("https://www.example.com/")) is HTMLStory
+    assert "example.com" in registry.hosts()
+
+
+def test_longest_host_wins():
+    registry = SiteRegistry({"example.com": "a:A", "m.example.com": "b:B"}, plugins=False)
+    assert registry.match("www.m.example.com") == "m.example.com"
+    assert registry.match("www.example.com") == "example.com"
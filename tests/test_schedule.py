@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from furl import furl
+
+from pyffdl.core.schedule import *
+
+
+def story(host, words, chapters):
+    return SimpleNamespace(
+        url=furl(f"https://{host}/s/1"),
+        metadata=SimpleNamespace(words=words, chapters=[str(x) for x in range(chapters)]),
+        main_page=b"<html></html>",
+    )
+
+
+def test_planned_from_story():
+    plan = Planned.from_story("https://a.org/s/1", story("a.org", 10000, 10), 8)
+    assert (plan.url, plan.site, plan.words, plan.chapters) == ("https://a.org/s/1", "a.org", 2000, 2)
+    assert plan.page == b"<html></html>"
+    assert Planned.from_story(None, story("a.org", 0, 10), 8).words == 2 * CHAPTER_WORDS
+    assert Planned.from_story(None, story("a.org", 0, 0)).words == 0
+    assert Planned.from_story(None, story("a.org", 100, 2), 5).chapters == 0
+
+
+def test_policies():
+    plans = [
+        Planned.from_story(None, story(host, words, 10))
+        for host, words in (("a.org", 300), ("a.org", 100), ("b.org", 200), ("a.org", 400))
+    ]
+    assert [x.words for x in shortest_first(plans)] == [100, 200, 300, 400]
+    assert [x.words for x in largest_first(plans)] == [400, 300, 200, 100]
+    assert [x.words for x in round_robin(plans)] == [300, 200, 100, 400]
+
+
+def test_estimate():
+    estimate = Estimate(total=300, stories=2, started=0)
+    assert estimate.remaining() is None
+    estimate.finish(Planned(None, "a.org", 100, 1))
+    assert estimate.remaining() > 0
+    assert str(estimate).startswith("1/2 stories, 100/300 words, about ")
+    assert format_duration(3725) == "1h 02m"
+    assert format_duration(65) == "1m 05s"
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+import zipfile
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+from bs4.element import Tag
+
+from pyffdl.core.server import *
+from pyffdl.sites.story import Story
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+
+class Pages(Transport):
+    """Serves a two-chapter story under any URL."""
+
+    def get(self, url, headers=None):
+        if "chapter=" in url:
+            text = "<p>Chapter text.</p>"
+        else:
+            options = '<option value="1">One</option><option value="2">Two</option>'
+            text = f'<html><body><select id="chapters">{options}</select></body></html>'
+        return TransportResponse(url, 200, text.encode("utf-8"))
+
+
+class TwoChapters(Story):
+    @classmethod
+    def parse(cls, url, verbose, force, **options):
+        return cls(url, verbose=verbose, force=force, transport=Pages(), **options)
+
+    @staticmethod
+    def get_raw_text(response):
+        return response.text
+
+    @staticmethod
+    def chapter_parser(value: Tag):
+        return value["value"], value.text
+
+    @property
+    def select(self):
+        return "select#chapters option"
+
+    def make_title_page(self):
+        self.metadata.title = self.url.path.segments[-1]
+        self.metadata.author.name = "Author"  # pylint:disable=assigning-non-slot
+        self.metadata.language = "English"
+
+    def make_new_chapter_url(self, url, value):
+        return url.copy().set(args={"chapter": value})
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr("pyffdl.core.jobs.get_site", lambda url: TwoChapters)
+    manager = JobManager(str(tmp_path), 2)
+    httpd = make_server("127.0.0.1", 0, manager)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+    manager.shutdown()
+
+
+def call(url, data=None):
+    """Returns the status and body of a request, also for error responses."""
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    try:
+        with urlopen(Request(url, body, method="POST" if body else "GET")) as response:
+            return response.status, response.read()
+    except HTTPError as e:
+        return e.code, e.read()
+
+
+def wait(job):
+    for _ in range(100):
+        if job.finished:
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"{job} didn't finish")
+
+
+def test_job_server(server):
+    status, body = call(f"{server}/jobs", {"kind": "download", "url": "https://example.com/story"})
+    assert status == 202
+    job_id = json.loads(body)["id"]
+    for _ in range(100):
+        status, body = call(f"{server}/jobs/{job_id}")
+        if json.loads(body)["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    assert status == 200
+    assert json.loads(body)["status"] == "done", json.loads(body)["error"]
+
+    status, body = call(f"{server}/jobs/{job_id}/epub")
+    assert status == 200
+    assert "EPUB/chapter01.xhtml" in zipfile.ZipFile(BytesIO(body)).namelist()
+    assert [x["id"] for x in json.loads(call(f"{server}/jobs")[1])] == [job_id]
+
+
+def test_job_server_errors(server, tmp_path):
+    assert call(f"{server}/jobs", {"kind": "delete"})[0] == 400
+    assert call(f"{server}/jobs", {"kind": "download"})[0] == 400
+    assert call(f"{server}/jobs", {"kind": "update", "file": str(tmp_path / "missing.epub")})[0] == 400
+    assert call(f"{server}/other", {"kind": "download", "url": "https://example.com/story"})[0] == 404
+    status, body = call(f"{server}/jobs/missing")
+    assert status == 404
+    assert json.loads(body) == {"error": "No such job."}
+
+
+def test_prune(tmp_path, monkeypatch):
+    monkeypatch.setattr("pyffdl.core.jobs.get_site", lambda url: TwoChapters)
+    manager = JobManager(str(tmp_path), 1, keep=1)
+    first = manager.submit({"url": "https://example.com/first"})
+    wait(first)
+    second = manager.submit({"url": "https://example.com/second"})
+    wait(second)
+    third = manager.submit({"url": "https://example.com/third"})
+    wait(third)
+    manager.shutdown()
+    assert manager.get(first.id) is None
+    assert [x.id for x in manager.all()] == [second.id, third.id]
@@ -26,4 +26,120 @@ def test_check_empty_setup():
 
 def test_prepare_style():
     with pytest.raises(AttributeError):
-        prepare_style("style.css")
\ No newline at end of file
+        prepare_style("style.css")
+
+
+def test_metadata_to_dict():
+    metadata = Metadata(
+        "https://example.com/s/1",
+        title="Title",
+        author=Author("Someone", "https://example.com/u/1"),
+        published=pendulum.datetime(2020, 1, 1),
+        updated=None,
+        genres=Listing("/", ["Drama"]),
+        characters=Characters(["A"], [["B", "C"]]),
+        chapters=[(1, "One"), "Two"],
+        extras=[Extra("Reviews", 3)],
+    )
+    data = metadata.to_dict()
+    assert data["url"] == "https://example.com/s/1"
+    assert data["author"] == {"name": "Someone", "url": "https://example.com/u/1"}
+    assert data["published"].startswith("2020-01-01T00:00:00")
+    assert data["updated"] is None
+    assert data["genres"] == ["Drama"]
+    assert data["characters"] == {"singles": ["A"], "couples": [["B", "C"]]}
+    assert data["chapters"] == ["One", "Two"]
+    assert data["extras"] == [{"name": "Reviews", "value": 3}]
+
+
+def test_volume_filename(tmp_path):
+    assert volume_filename("story.epub", 1) == Path("story - Vol 01.epub")
+    assert volume_filename("story - Vol 01.epub", 12) == Path("story - Vol 12.epub")
+    assert last_volume(tmp_path / "story.epub") is None
+    for number in (1, 2, 10):
+        volume_filename(tmp_path / "story.epub", number).touch()
+    (tmp_path / "other story - Vol 11.epub").touch()
+    assert last_volume(tmp_path / "story - Vol 01.epub") == tmp_path / "story - Vol 10.epub"
+
+
+def test_html_story_requests(tmp_path):
+    from pyffdl.sites.html import HTMLStory
+    from pyffdl.utilities.transport import Transport, TransportResponse
+
+    class RecordingTransport(Transport):
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url, headers=None):
+            self.urls.append(url)
+            return TransportResponse(url, 200, f"<p>Text of {url}</p>".encode("utf-8"))
+
+    transport = RecordingTransport()
+    urls = [f"https://example.com/chapter{x}.html" for x in range(1, 5)]
+    story = HTMLStory.from_chapters(
+        urls, "Author", "Title", verbose=False, transport=transport, filename=str(tmp_path / "story.epub")
+    )
+    story.run()
+    assert sorted(transport.urls) == urls
+    assert (tmp_path / "story.epub").exists()
+
+
+def test_revalidate_book_without_index(tmp_path):
+    from ebooklib import epub
+
+    from pyffdl.sites.html import HTMLStory
+    from pyffdl.utilities.chapters import INDEX_ID
+    from pyffdl.utilities.transport import Transport, TransportResponse
+    from pyffdl.utilities.writer import write_epub_fast
+
+    class ChangingTransport(Transport):
+        def __init__(self, text):
+            self.text = text
+
+        def get(self, url, headers=None):
+            return TransportResponse(url, 200, f"<p>{self.text} of {url}</p>".encode("utf-8"))
+
+    def texts(path):
+        book = epub.read_epub(str(path))
+        chapters = [x for x in book.get_items_of_type(9) if x.file_name.startswith("chapter")]
+        return [x.get_body_content().decode("utf-8") for x in chapters], ChapterIndex.from_book(book)
+
+    path = tmp_path / "story.epub"
+    urls = [f"https://example.com/chapter{x}.html" for x in range(1, 3)]
+
+    def run(text, revalidate):
+        HTMLStory.from_chapters(
+            urls, "Author", "Title", verbose=False, revalidate=revalidate,
+            transport=ChangingTransport(text), filename=str(path),
+        ).run()
+
+    run("Text", False)
+    book = epub.read_epub(str(path))
+    book.items = [x for x in book.items if x.id != INDEX_ID]
+    write_epub_fast(str(path), book)
+
+    run("New text", True)
+    chapters, index = texts(path)
+    assert all("New text" not in x for x in chapters)
+    assert sorted(index.records) == [1, 2]
+
+    run("Newer text", True)
+    chapters, index = texts(path)
+    assert all("Newer text" in x for x in chapters)
+
+
+def test_split_existing_book(tmp_path):
+    from pyffdl.sites.html import HTMLStory
+    from pyffdl.utilities.transport import Transport, TransportResponse
+
+    class Pages(Transport):
+        def get(self, url, headers=None):
+            return TransportResponse(url, 200, f"<p>Text of {url}</p>".encode("utf-8"))
+
+    urls = [f"https://example.com/chapter{x}.html" for x in range(1, 4)]
+    for limit in (None, 2):
+        HTMLStory.from_chapters(
+            urls, "Author", "Title", verbose=False, transport=Pages(),
+            filename=str(tmp_path / "story.epub"), max_chapters_per_volume=limit,
+        ).run()
+    assert sorted(x.name for x in tmp_path.glob("*.epub")) == ["story - Vol 01.epub", "story - Vol 02.epub"]
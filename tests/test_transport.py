@@ -0,0 +1,65 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from requests import Session
+
+from pyffdl.utilities.transport import *
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):  # pylint:disable=redefined-builtin
+        pass
+
+    def do_GET(self):  # noqa: N802
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = f"<p>{self.path}</p>".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{self.path}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_response():
+    response = TransportResponse("http://example.com/", 200, "čau".encode("utf-8"))
+    assert response.ok
+    assert response.text == "čau"
+    assert not TransportResponse("http://example.com/", 404, b"").ok
+
+
+def test_session_transport(server):
+    transport = SessionTransport(Session())
+    assert not transport.multiplexed
+    responses = transport.get_many([f"{server}/1", f"{server}/2"])
+    assert [x.text for x in responses] == ["<p>/1</p>", "<p>/2</p>"]
+    assert not transport.get(f"{server}/missing").ok
+
+
+def test_http2_transport(server):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    transport = HTTP2Transport(max_streams=3)
+    assert transport.multiplexed
+    urls = [f"{server}/{x}" for x in range(10)]
+    responses = transport.get_many(urls)
+    assert [x.text for x in responses] == [f"<p>/{x}</p>" for x in range(10)]
+    response = transport.get(f"{server}/1")
+    assert response.ok
+    assert response.headers.get("etag") == '"/1"'
+    assert not transport.get(f"{server}/missing").ok
+    transport.close()
@@ -0,0 +1,78 @@
+from typing import List
+
+import pendulum
+from furl import furl
+
+from pyffdl.core.watch import *
+from pyffdl.sites.story import Story
+from pyffdl.utilities.transport import Transport, TransportResponse
+
+
+def test_check_interval():
+    now = pendulum.datetime(2020, 1, 10)
+    metadata = Metadata(furl("https://example.com"))
+    assert check_interval(metadata, now.timestamp()) == DEFAULT_INTERVAL
+
+    metadata.published = pendulum.datetime(2020, 1, 1)
+    metadata.updated = pendulum.datetime(2020, 1, 9)
+    metadata.chapters = [str(x) for x in range(9)]
+    assert check_interval(metadata, now.timestamp()) == DAY / 2
+
+    metadata.chapters = ["1", "2"]
+    assert check_interval(metadata, now.timestamp()) == 4 * DAY
+
+    metadata.updated = pendulum.datetime(2010, 1, 1)
+    assert check_interval(metadata, now.timestamp()) == MAX_INTERVAL
+
+
+def test_watchlist(tmp_path):
+    path = tmp_path / "watchlist.json"
+    watchlist = Watchlist.load(path)
+    assert watchlist.stories == {}
+    watchlist.add("https://example.com/1")
+    watchlist.add("https://example.com/2").dormant = True
+    watchlist.save()
+
+    loaded = Watchlist.load(path)
+    assert loaded == watchlist
+    assert [x.url for x in loaded.due(0)] == ["https://example.com/1"]
+
+    watchlist.remove("https://example.com/1")
+    watchlist.save()
+    loaded.refresh()
+    assert list(loaded.stories) == ["https://example.com/2"]
+    assert loaded.next_due() is None
+
+
+class MainPage(Transport):
+    def get(self, url, headers=None):
+        return TransportResponse(url, 200, b"<html><body></body></html>")
+
+
+class CountingStory(Story):
+    calls: List[str] = []
+
+    @classmethod
+    def parse(cls, url, verbose, force, **options):
+        return cls(url, verbose=verbose, force=force, transport=MainPage(), **options)
+
+    def make_title_page(self):
+        self.calls.append("title")
+        self.metadata.title = "Title"
+
+    def get_chapters(self):
+        self.calls.append("chapters")
+        self.metadata.chapters = ["1", "2"]
+
+    def make_ebook(self):
+        self.calls.append("ebook")
+
+
+def test_check_story_parses_once(tmp_path, monkeypatch):
+    monkeypatch.setattr("pyffdl.core.watch.get_site", lambda url: CountingStory)
+    watchlist = Watchlist.load(tmp_path / "watchlist.json")
+    entry = watchlist.add("https://example.com/1")
+    entry.file = str(tmp_path / "story.epub")
+    check_story(watchlist, entry)
+    assert CountingStory.calls == ["title", "chapters", "ebook"]
+    assert entry.chapters == 2
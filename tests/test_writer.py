@@ -0,0 +1,64 @@
+import zipfile
+
+from ebooklib import epub
+
+from pyffdl.utilities.writer import *
+
+
+def make_book() -> epub.EpubBook:
+    book = epub.EpubBook()
+    book.set_identifier("id")
+    book.set_title("Title & Co")
+    book.set_language("en")
+    book.add_author("Author")
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.set_cover("cover.jpg", b"\xff\xd8\xff")
+    chapter = epub.EpubHtml(title="One", file_name="chapter01.xhtml", uid="chapter01", content="<p>foo</p>")
+    book.add_item(chapter)
+    book.toc = [chapter]
+    book.spine = ["cover", chapter, "nav"]
+    return book
+
+
+def test_compression_settings():
+    assert Compression.named("store").settings("EPUB/chapter01.xhtml") == (zipfile.ZIP_STORED, None)
+    assert Compression.named("max").settings("EPUB/chapter01.xhtml") == (zipfile.ZIP_DEFLATED, 9)
+    assert Compression.named("max").settings("EPUB/cover.jpg") == (zipfile.ZIP_STORED, None)
+    assert Compression().settings("mimetype") == (zipfile.ZIP_STORED, None)
+
+
+def test_write_epub_fast(tmp_path):
+    target = tmp_path / "book.epub"
+    write_epub_fast(str(target), make_book(), Compression.named("fast"))
+    with zipfile.ZipFile(target) as archive:
+        first, *_ = archive.infolist()
+        assert first.filename == "mimetype"
+        assert first.compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("EPUB/cover.jpg").compress_type == zipfile.ZIP_STORED
+    book = epub.read_epub(str(target))
+    assert book.get_item_with_id("chapter01").get_body_content().strip() == b"<p>foo</p>"
+    assert book.title == "Title & Co"
+
+
+def test_write_epub_fast_escaped_title(tmp_path):
+    from lxml import etree
+
+    from pyffdl.sites.story import Story
+
+    title = "Tom & Jerry <1>"
+    book = make_book()
+    chapter = epub.EpubHtml(
+        title=title, file_name="chapter02.xhtml", uid="chapter02", content=Story.chapter_header(title) + "<p>bar</p>"
+    )
+    book.add_item(chapter)
+    book.toc.append(chapter)
+    book.spine.insert(-1, chapter)
+    target = tmp_path / "book.epub"
+    write_epub_fast(str(target), book)
+    with zipfile.ZipFile(target) as archive:
+        document = etree.fromstring(archive.read("EPUB/chapter02.xhtml"))
+        etree.fromstring(archive.read("EPUB/nav.xhtml"))
+    namespaces = {"x": "http://www.w3.org/1999/xhtml"}
+    assert document.find(".//x:h1", namespaces).text == title
+    assert document.find(".//x:title", namespaces).text == title